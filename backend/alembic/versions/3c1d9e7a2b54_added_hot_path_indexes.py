@@ -0,0 +1,40 @@
+"""added hot path indexes
+
+Revision ID: 3c1d9e7a2b54
+Revises: f6f884f5a4fe
+Create Date: 2026-10-17 10:12:41.318204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3c1d9e7a2b54'
+down_revision: Union[str, Sequence[str], None] = 'f6f884f5a4fe'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_attendance_gym_id_date', 'attendance', ['gym_id', 'date'], unique=False, if_not_exists=True)
+    op.create_index('ix_payments_gym_id_payment_date', 'payments', ['gym_id', 'payment_date'], unique=False, if_not_exists=True)
+    op.create_index('ix_daily_subscriptions_gym_id_date', 'daily_subscriptions', ['gym_id', 'subscription_date'], unique=False, if_not_exists=True)
+    op.create_index('ix_subscription_gym_id_active_end', 'subscription', ['gym_id', 'is_active', 'end_date'], unique=False, if_not_exists=True)
+    op.create_index('ix_subscription_user_id_active_end', 'subscription', ['user_id', 'is_active', 'end_date'], unique=False, if_not_exists=True)
+    op.create_index('ix_users_gym_id_role', 'users', ['gym_id', 'role'], unique=False, if_not_exists=True)
+    op.create_index('ix_products_gym_id_created_at', 'products', ['gym_id', 'created_at'], unique=False, if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_products_gym_id_created_at', table_name='products')
+    op.drop_index('ix_users_gym_id_role', table_name='users')
+    op.drop_index('ix_subscription_user_id_active_end', table_name='subscription')
+    op.drop_index('ix_subscription_gym_id_active_end', table_name='subscription')
+    op.drop_index('ix_daily_subscriptions_gym_id_date', table_name='daily_subscriptions')
+    op.drop_index('ix_payments_gym_id_payment_date', table_name='payments')
+    op.drop_index('ix_attendance_gym_id_date', table_name='attendance')
@@ -0,0 +1,33 @@
+"""added users search indexes
+
+Revision ID: 5b7f3a91c2e8
+Revises: 8e42b0c6d1f3
+Create Date: 2026-10-17 12:21:47.903115
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5b7f3a91c2e8'
+down_revision: Union[str, Sequence[str], None] = '8e42b0c6d1f3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    op.create_index('ix_users_first_name_trgm', 'users', ['first_name'], unique=False, postgresql_using='gin', postgresql_ops={'first_name': 'gin_trgm_ops'}, if_not_exists=True)
+    op.create_index('ix_users_last_name_trgm', 'users', ['last_name'], unique=False, postgresql_using='gin', postgresql_ops={'last_name': 'gin_trgm_ops'}, if_not_exists=True)
+    op.create_index('ix_users_phone_number_trgm', 'users', ['phone_number'], unique=False, postgresql_using='gin', postgresql_ops={'phone_number': 'gin_trgm_ops'}, if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_users_phone_number_trgm', table_name='users', postgresql_using='gin')
+    op.drop_index('ix_users_last_name_trgm', table_name='users', postgresql_using='gin')
+    op.drop_index('ix_users_first_name_trgm', table_name='users', postgresql_using='gin')
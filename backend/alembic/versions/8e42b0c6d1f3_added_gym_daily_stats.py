@@ -0,0 +1,40 @@
+"""added gym daily stats
+
+Revision ID: 8e42b0c6d1f3
+Revises: 3c1d9e7a2b54
+Create Date: 2026-10-17 11:04:09.552871
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8e42b0c6d1f3'
+down_revision: Union[str, Sequence[str], None] = '3c1d9e7a2b54'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('gym_daily_stats',
+    sa.Column('gym_id', sa.UUID(), nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('card_revenue', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('cash_revenue', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('market_revenue', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('daily_visits', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('attendance_count', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('new_subscriptions', sa.Integer(), server_default='0', nullable=False),
+    sa.ForeignKeyConstraint(['gym_id'], ['gyms.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('gym_id', 'day'),
+    if_not_exists=True,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('gym_daily_stats')
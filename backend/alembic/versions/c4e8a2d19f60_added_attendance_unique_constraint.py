@@ -0,0 +1,42 @@
+"""added attendance unique constraint
+
+Revision ID: c4e8a2d19f60
+Revises: 5b7f3a91c2e8
+Create Date: 2026-10-17 13:40:22.117420
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4e8a2d19f60'
+down_revision: Union[str, Sequence[str], None] = '5b7f3a91c2e8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Drop duplicate check-ins left by the old check-then-insert path
+    op.execute(
+        """
+        DELETE FROM attendance a
+        USING attendance b
+        WHERE a.user_id = b.user_id
+          AND a.gym_id = b.gym_id
+          AND a.date = b.date
+          AND a.id > b.id
+        """
+    )
+    # Skip when create_all already made it on a database stamped at the baseline
+    existing = sa.inspect(op.get_bind()).get_unique_constraints('attendance')
+    if 'uq_attendance_user_gym_date' not in {uc['name'] for uc in existing}:
+        op.create_unique_constraint('uq_attendance_user_gym_date', 'attendance', ['user_id', 'gym_id', 'date'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint('uq_attendance_user_gym_date', 'attendance', type_='unique')
@@ -0,0 +1,28 @@
+"""added product thumbnail path
+
+Revision ID: d91b6f0c3a27
+Revises: c4e8a2d19f60
+Create Date: 2026-10-17 18:12:45.301772
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd91b6f0c3a27'
+down_revision: Union[str, Sequence[str], None] = 'c4e8a2d19f60'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('products', sa.Column('thumbnail_path', sa.String(length=255), nullable=True), if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('products', 'thumbnail_path')
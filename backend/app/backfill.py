@@ -0,0 +1,121 @@
+"""
+Rebuild the gym_daily_stats rollup from the raw tables.
+
+app.migrate runs it on deploy while the table is empty; run it by hand
+whenever the rollup needs to be recomputed:
+
+    python -m app.backfill
+"""
+
+import asyncio
+import logging
+from collections import defaultdict
+
+from sqlalchemy import delete, func, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .database import async_session, set_statement_timeout
+from .logging_config import setup_logging
+from .stats import REVENUE_COLUMNS
+from .utils import invalidate_barchart_caches
+from .models import (
+    Attendance,
+    DailySubscriptions,
+    GymDailyStats,
+    Payment,
+    ProductSales,
+    Subscriptions,
+)
+
+logger = logging.getLogger("backfill")
+
+STAT_COLUMNS = (
+    "card_revenue",
+    "cash_revenue",
+    "market_revenue",
+    "daily_visits",
+    "attendance_count",
+    "new_subscriptions",
+)
+
+
+async def collect_daily_stats(db: AsyncSession) -> dict:
+    stats = defaultdict(lambda: defaultdict(int))
+
+    result = await db.execute(
+        select(
+            Payment.gym_id,
+            Payment.payment_date,
+            Payment.payment_method,
+            func.sum(Payment.amount),
+        ).group_by(Payment.gym_id, Payment.payment_date, Payment.payment_method)
+    )
+    for gym_id, day, method, amount in result.all():
+        column = REVENUE_COLUMNS.get(method)
+        if column:
+            stats[(gym_id, day)][column] += amount or 0
+
+    sources = [
+        (DailySubscriptions, DailySubscriptions.subscription_date, "daily_visits"),
+        (Attendance, Attendance.date, "attendance_count"),
+        (Subscriptions, Subscriptions.start_date, "new_subscriptions"),
+    ]
+    for model, day_column, column in sources:
+        result = await db.execute(
+            select(model.gym_id, day_column, func.count(model.id)).group_by(
+                model.gym_id, day_column
+            )
+        )
+        for gym_id, day, count in result.all():
+            stats[(gym_id, day)][column] += count
+
+    result = await db.execute(
+        select(
+            ProductSales.gym_id,
+            ProductSales.sale_date,
+            func.sum(ProductSales.total_price),
+        ).group_by(ProductSales.gym_id, ProductSales.sale_date)
+    )
+    for gym_id, day, amount in result.all():
+        stats[(gym_id, day)]["market_revenue"] += amount or 0
+
+    return stats
+
+
+async def backfill_daily_stats():
+    async with async_session() as db:
+        # Full-table aggregates; not bound by the request statement timeout
+        await set_statement_timeout(db, 0)
+
+        # Hold off increment_daily_stats until the rebuild commits. Writers
+        # that already bumped a counter must commit before the lock is
+        # granted, so their rows are in the snapshot; later ones block and
+        # apply on top of the rebuilt rows instead of being wiped out.
+        await db.execute(text("LOCK TABLE gym_daily_stats IN EXCLUSIVE MODE"))
+        stats = await collect_daily_stats(db)
+
+        rows = [
+            {
+                "gym_id": gym_id,
+                "day": day,
+                **{column: values[column] for column in STAT_COLUMNS},
+            }
+            for (gym_id, day), values in stats.items()
+            if gym_id is not None
+        ]
+
+        await db.execute(delete(GymDailyStats))
+        for start in range(0, len(rows), 1000):
+            await db.execute(
+                GymDailyStats.__table__.insert(), rows[start : start + 1000]
+            )
+        await db.commit()
+
+    # Closed months may have changed
+    await invalidate_barchart_caches()
+    logger.info("Backfilled %d gym_daily_stats rows", len(rows))
+
+
+if __name__ == "__main__":
+    setup_logging()
+    asyncio.run(backfill_daily_stats())
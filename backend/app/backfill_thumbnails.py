@@ -0,0 +1,42 @@
+"""
+Generate missing product thumbnails and record them on the products.
+
+Run once after the migration that adds products.thumbnail_path; images
+uploaded before it only have their thumbnail_path filled in here:
+
+    python -m app.backfill_thumbnails
+"""
+
+import asyncio
+import logging
+
+from sqlalchemy import select
+
+from .database import async_session
+from .images import generate_thumbnail
+from .logging_config import setup_logging
+from .models import Products
+
+logger = logging.getLogger("backfill")
+
+
+async def backfill_thumbnails():
+    async with async_session() as db:
+        result = await db.execute(
+            select(Products.image_path)
+            .where(Products.image_path.is_not(None), Products.thumbnail_path.is_(None))
+            .distinct()
+        )
+        image_paths = result.scalars().all()
+
+    # Files are content-addressed, so each image is processed once however
+    # many products share it
+    for image_path in image_paths:
+        await generate_thumbnail(image_path)
+
+    logger.info("Backfilled thumbnails for %d images", len(image_paths))
+
+
+if __name__ == "__main__":
+    setup_logging()
+    asyncio.run(backfill_thumbnails())
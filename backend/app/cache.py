@@ -0,0 +1,333 @@
+import json
+import time
+import asyncio
+import logging
+from collections import OrderedDict
+from datetime import date
+from uuid import UUID
+
+from redis.exceptions import RedisError
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .config import settings
+from .models import Gyms, Users
+from .rate_limiter import redis
+from .metrics import register_stats
+
+logger = logging.getLogger("cache")
+
+
+class TTLCache:
+    """Small in-process LRU cache whose entries expire after `ttl` seconds."""
+
+    def __init__(self, maxsize: int, ttl: int):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict = OrderedDict()
+
+    def get(self, key):
+        item = self._data.get(key)
+        if item is None:
+            return None
+
+        expires_at, value = item
+        if expires_at < time.monotonic():
+            del self._data[key]
+            return None
+
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key, value):
+        self._data[key] = (time.monotonic() + self.ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def pop(self, key):
+        self._data.pop(key, None)
+
+    def items(self):
+        return [(key, value) for key, (_, value) in self._data.items()]
+
+    def clear(self):
+        self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class InvalidationListener:
+    """
+    Base for in-process caches shared across workers.
+
+    `publish` broadcasts an invalidation message on `channel`; every worker
+    runs a listener task that hands each message to `drop_local`.
+    """
+
+    channel: str
+
+    def __init__(self):
+        self._listener: asyncio.Task | None = None
+
+    def drop_local(self, message: str):
+        raise NotImplementedError
+
+    async def publish(self, message: str):
+        try:
+            await redis.publish(self.channel, message)
+        except RedisError:
+            logger.warning(
+                "Redis unavailable, %s invalidated in this worker only", self.channel
+            )
+
+    async def _listen(self):
+        while True:
+            pubsub = redis.pubsub()
+            try:
+                await pubsub.subscribe(self.channel)
+                async for message in pubsub.listen():
+                    if message["type"] != "message":
+                        continue
+                    try:
+                        self.drop_local(message["data"])
+                    except Exception:
+                        logger.exception("Bad invalidation message on %s", self.channel)
+            except RedisError:
+                logger.warning("Lost Redis pub/sub connection, reconnecting")
+                await asyncio.sleep(1)
+            finally:
+                await pubsub.aclose()
+
+    async def start(self):
+        if self._listener is None:
+            self._listener = asyncio.create_task(self._listen())
+
+    async def stop(self):
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            self._listener = None
+
+
+PRINCIPAL_FIELDS = (
+    "id",
+    "first_name",
+    "last_name",
+    "phone_number",
+    "role",
+    "gender",
+    "gym_id",
+    "date_of_birth",
+    "created_at",
+    "is_active",
+    "is_superuser",
+)
+
+
+def _dump_principal(user: Users) -> str:
+    data = {}
+    for field in PRINCIPAL_FIELDS:
+        value = getattr(user, field)
+        if isinstance(value, UUID):
+            value = str(value)
+        elif isinstance(value, date):
+            value = value.isoformat()
+        data[field] = value
+    return json.dumps(data)
+
+
+def _load_principal(raw: str) -> Users:
+    data = json.loads(raw)
+    data["id"] = UUID(data["id"])
+    if data["gym_id"]:
+        data["gym_id"] = UUID(data["gym_id"])
+    for field in ("date_of_birth", "created_at"):
+        if data[field]:
+            data[field] = date.fromisoformat(data[field])
+    return Users(**data)
+
+
+class PrincipalCache(InvalidationListener):
+    """
+    Caches the authenticated user keyed by the token subject (phone number).
+
+    Lookups go to the in-process LRU first, then to Redis, and only then to
+    the database. Cached principals are detached `Users` instances without
+    the password hash or relationships loaded. Invalidations are published
+    so every worker drops its local copy.
+    """
+
+    channel = "principal:invalidate"
+
+    def __init__(self, maxsize: int, ttl: int):
+        super().__init__()
+        self.ttl = ttl
+        self.local = TTLCache(maxsize, ttl)
+        self.local_hits = 0
+        self.redis_hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _key(phone_number: str) -> str:
+        return f"principal:{phone_number}"
+
+    @staticmethod
+    def _gym_key(gym_id) -> str:
+        return f"principal:gym:{gym_id}"
+
+    async def get(self, phone_number: str) -> Users | None:
+        user = self.local.get(phone_number)
+        if user is not None:
+            self.local_hits += 1
+            return user
+
+        try:
+            raw = await redis.get(self._key(phone_number))
+        except RedisError:
+            logger.warning("Redis unavailable, skipping principal cache lookup")
+            raw = None
+
+        if raw is None:
+            self.misses += 1
+            return None
+
+        user = _load_principal(raw)
+        self.local.set(phone_number, user)
+        self.redis_hits += 1
+        return user
+
+    async def set(self, user: Users):
+        raw = _dump_principal(user)
+        self.local.set(user.phone_number, _load_principal(raw))
+
+        try:
+            pipeline = redis.pipeline()
+            pipeline.set(self._key(user.phone_number), raw, ex=self.ttl)
+            if user.gym_id:
+                pipeline.sadd(self._gym_key(user.gym_id), user.phone_number)
+                pipeline.expire(self._gym_key(user.gym_id), self.ttl)
+            await pipeline.execute()
+        except RedisError:
+            logger.warning("Redis unavailable, principal cached in-process only")
+
+    def drop_local(self, message: str):
+        kind, _, value = message.partition(":")
+        if kind == "phone":
+            self.local.pop(value)
+        elif kind == "gym":
+            for phone_number, user in self.local.items():
+                if str(user.gym_id) == value:
+                    self.local.pop(phone_number)
+
+    async def invalidate(self, phone_number: str):
+        self.drop_local(f"phone:{phone_number}")
+        try:
+            await redis.delete(self._key(phone_number))
+        except RedisError:
+            logger.warning("Redis unavailable, could not invalidate principal")
+        await self.publish(f"phone:{phone_number}")
+
+    async def invalidate_gym(self, gym_id):
+        gym_id = str(gym_id)
+        self.drop_local(f"gym:{gym_id}")
+
+        try:
+            phone_numbers = await redis.smembers(self._gym_key(gym_id))
+            keys = [self._key(phone) for phone in phone_numbers]
+            await redis.delete(self._gym_key(gym_id), *keys)
+        except RedisError:
+            logger.warning("Redis unavailable, could not invalidate gym principals")
+        await self.publish(f"gym:{gym_id}")
+
+    def stats(self) -> dict:
+        return {
+            "local_hits": self.local_hits,
+            "redis_hits": self.redis_hits,
+            "misses": self.misses,
+            "size": len(self.local),
+        }
+
+
+principal_cache = PrincipalCache(
+    maxsize=settings.PRINCIPAL_CACHE_SIZE, ttl=settings.PRINCIPAL_CACHE_TTL
+)
+register_stats(
+    "principal_cache",
+    principal_cache.stats,
+    counters=("local_hits", "redis_hits", "misses"),
+)
+
+
+class GymSettingsCache(InvalidationListener):
+    """
+    Per-gym `marketplace_enabled` / `is_active` flags cached in-process.
+
+    Writers call `invalidate`, which drops the local entry and publishes the
+    gym id so every other worker drops its copy too; the TTL bounds
+    staleness if a message is missed.
+    """
+
+    channel = "gym-settings:invalidate"
+
+    def __init__(self, maxsize: int, ttl: int):
+        super().__init__()
+        self.local = TTLCache(maxsize, ttl)
+        self.hits = 0
+        self.misses = 0
+
+    async def get(self, gym_id, db: AsyncSession) -> dict | None:
+        gym_settings = self.local.get(str(gym_id))
+        if gym_settings is not None:
+            self.hits += 1
+            return gym_settings
+
+        self.misses += 1
+        result = await db.execute(
+            select(Gyms.marketplace_enabled, Gyms.is_active).where(Gyms.id == gym_id)
+        )
+        row = result.first()
+        if row is None:
+            return None
+
+        gym_settings = {
+            "marketplace_enabled": row.marketplace_enabled,
+            "is_active": row.is_active,
+        }
+        self.local.set(str(gym_id), gym_settings)
+        return gym_settings
+
+    async def preload(self, db: AsyncSession):
+        result = await db.execute(
+            select(Gyms.id, Gyms.marketplace_enabled, Gyms.is_active)
+        )
+        for row in result.all():
+            self.local.set(
+                str(row.id),
+                {
+                    "marketplace_enabled": row.marketplace_enabled,
+                    "is_active": row.is_active,
+                },
+            )
+
+    def drop_local(self, message: str):
+        self.local.pop(message)
+
+    async def invalidate(self, gym_id):
+        self.drop_local(str(gym_id))
+        await self.publish(str(gym_id))
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses, "size": len(self.local)}
+
+
+gym_settings_cache = GymSettingsCache(
+    maxsize=settings.GYM_SETTINGS_CACHE_SIZE, ttl=settings.GYM_SETTINGS_CACHE_TTL
+)
+register_stats(
+    "gym_settings_cache", gym_settings_cache.stats, counters=("hits", "misses")
+)
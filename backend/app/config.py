@@ -19,10 +19,68 @@ class Settings(BaseSettings):
     REDIS_HOST: str
     REDIS_PORT: int
     REDIS_PASSWORD: str
+    REDIS_MAX_CONNECTIONS: int = 50
+
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30.0
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    DB_STATEMENT_CACHE_SIZE: int = 100
+    # Server-side default for every connection, so it bounds each statement
+    # of every request; set_statement_timeout overrides it per transaction
+    DB_STATEMENT_TIMEOUT_MS: int = 15000
+
+    SCHEMA_CREATE_ALL: bool = False
+
+    SERVER_HOST: str = "0.0.0.0"
+    SERVER_PORT: int = 8000
+    WEB_CONCURRENCY: int = 0
+    MAX_REQUESTS: int = 10000
+    MAX_REQUESTS_JITTER: int = 1000
+    GRACEFUL_TIMEOUT: int = 30
+    WORKER_TIMEOUT: int = 60
+    KEEPALIVE: int = 5
+    DB_CONNECTION_BUDGET: int = 80
+    REDIS_CONNECTION_BUDGET: int = 200
 
     MONTHLY_PROFIT: str
     WEEKLY_CLIENTS: str
 
+    PRINCIPAL_CACHE_TTL: int = 60
+    PRINCIPAL_CACHE_SIZE: int = 1024
+
+    GYM_SETTINGS_CACHE_TTL: int = 300
+    GYM_SETTINGS_CACHE_SIZE: int = 1024
+
+    PASSWORD_HASH_WORKERS: int = 4
+
+    WS_SEND_TIMEOUT: float = 2.0
+
+    # How far ahead of the server a door controller's clock may run
+    SCAN_CLOCK_SKEW_SECONDS: int = 300
+
+    RATE_LIMIT_REDIS_TIMEOUT: float = 0.05
+
+    SLOW_REQUEST_MS: int = 500
+    SLOW_REQUEST_QUERIES: int = 20
+    METRICS_PUSH_INTERVAL: float = 5.0
+    # Bearer token Prometheus sends to scrape /metrics; unset disables them
+    METRICS_TOKEN: str | None = None
+
+    LOG_LEVEL: str = "INFO"
+    LOG_JSON: bool = True
+    # Unset by default: JSON on stdout is collected by the container runtime.
+    # When set, each worker process writes and rotates its own <name>.<pid>.log
+    LOG_FILE: str | None = None
+    LOG_FILE_MAX_BYTES: int = 10 * 1024 * 1024
+    LOG_FILE_BACKUP_COUNT: int = 5
+    LOG_INFO_SAMPLE_RATE: float = 1.0
+
+    PRODUCT_IMAGE_MAX_BYTES: int = 5 * 1024 * 1024
+    # Room for the form fields and multipart framing around the image
+    UPLOAD_BODY_OVERHEAD_BYTES: int = 64 * 1024
+    THUMBNAIL_WORKERS: int = 2
 
     class Config:
         env_file = "../.env"
@@ -1,17 +1,96 @@
+import time
+
+from sqlalchemy import text
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import declarative_base, sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from .config import settings
 
-
 DATABASE_URL = settings.DATABASE_URL
 
-engine = create_async_engine(DATABASE_URL)
+
+class PoolMetrics:
+    """Checkout latency counters for the engine's connection pool."""
+
+    def __init__(self):
+        self.checkouts = 0
+        self.checkout_seconds = 0.0
+        self.checkout_max_seconds = 0.0
+        self.timeouts = 0
+
+    def observe_checkout(self, seconds: float):
+        self.checkouts += 1
+        self.checkout_seconds += seconds
+        self.checkout_max_seconds = max(self.checkout_max_seconds, seconds)
+
+
+pool_metrics = PoolMetrics()
+
+
+class InstrumentedPool(AsyncAdaptedQueuePool):
+    """Queue pool that records how long each checkout waited for a connection."""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            pool_metrics.timeouts += 1
+            raise
+        finally:
+            pool_metrics.observe_checkout(time.perf_counter() - start)
+
+
+engine = create_async_engine(
+    DATABASE_URL,
+    poolclass=InstrumentedPool,
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
+    pool_timeout=settings.DB_POOL_TIMEOUT,
+    pool_recycle=settings.DB_POOL_RECYCLE,
+    pool_pre_ping=settings.DB_POOL_PRE_PING,
+    connect_args={
+        "statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+        "server_settings": {
+            "statement_timeout": str(settings.DB_STATEMENT_TIMEOUT_MS),
+        },
+    },
+)
 
 async_session = sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
 
 Base = declarative_base()
 
 
+def pool_stats() -> dict:
+    pool = engine.pool
+    checkouts = pool_metrics.checkouts
+    return {
+        "size": pool.size(),
+        "checked_in": pool.checkedin(),
+        "in_use": pool.checkedout(),
+        "overflow": max(pool.overflow(), 0),
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "checkouts": checkouts,
+        "checkout_timeouts": pool_metrics.timeouts,
+        "checkout_seconds_total": pool_metrics.checkout_seconds,
+        "checkout_seconds_avg": (
+            pool_metrics.checkout_seconds / checkouts if checkouts else 0.0
+        ),
+        "checkout_seconds_max": pool_metrics.checkout_max_seconds,
+    }
+
+
+async def set_statement_timeout(session: AsyncSession, milliseconds: int):
+    """
+    Override statement_timeout for the current transaction only (0 disables
+    it). Without an override DB_STATEMENT_TIMEOUT_MS applies, as it is set
+    on every pooled connection.
+    """
+    await session.execute(text(f"SET LOCAL statement_timeout = {int(milliseconds)}"))
+
+
 async def get_db():
     async with async_session() as session:
         try:
@@ -1,17 +1,24 @@
+import secrets
 from uuid import UUID
 from jose import JWTError, jwt
 
 from fastapi import HTTPException, status, Depends
-from fastapi.security import OAuth2PasswordBearer
+from fastapi.security import (
+    HTTPAuthorizationCredentials,
+    HTTPBearer,
+    OAuth2PasswordBearer,
+)
 
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 
+from .cache import principal_cache
 from .config import settings
 from .database import get_db
 from .models import Users
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
+metrics_scheme = HTTPBearer(auto_error=False)
 
 exception = HTTPException(
     status_code=status.HTTP_401_UNAUTHORIZED,
@@ -31,12 +38,17 @@ async def get_current_user(
     except JWTError:
         raise exception
 
+    user = await principal_cache.get(phone_number)
+    if user is not None:
+        return user
+
     result = await db.execute(select(Users).where(Users.phone_number == phone_number))
     user = result.scalars().first()
 
     if user is None:
         raise exception
 
+    await principal_cache.set(user)
     return user
 
 
@@ -51,3 +63,19 @@ async def is_admin(user: Users = Depends(get_current_user)) -> bool:
 
 async def get_gym_id(user: Users = Depends(get_current_user)) -> UUID:
     return user.gym_id
+
+
+async def verify_metrics_token(
+    credentials: HTTPAuthorizationCredentials | None = Depends(metrics_scheme),
+) -> bool:
+    """
+    Guard for the /metrics endpoints: scrapers send METRICS_TOKEN as a
+    bearer token. Without a configured token the endpoints do not exist.
+    """
+    if not settings.METRICS_TOKEN:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    if credentials is None or not secrets.compare_digest(
+        credentials.credentials, settings.METRICS_TOKEN
+    ):
+        raise exception
+    return True
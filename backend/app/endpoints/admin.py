@@ -7,10 +7,17 @@ from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from ..logging_config import setup_logging
-from ..utils import get_active_subscription 
+from ..utils import (
+    clear_entitlements,
+    get_active_subscription,
+    set_entitlement,
+)
+from ..stats import increment_daily_stats, revenue_column
 from ..dependancy import is_admin, get_gym_id
 from ..database import get_db
+from ..websocket import publish_user_change
 from ..models import (
+    Users,
     SubscriptionPlans,
     Subscriptions,
     Payment,
@@ -153,15 +160,20 @@ async def delete_subscription_plan(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Subscription plan not found",
         )
+    # Subscriptions cascade with the plan; their cached entitlements must go too
+    result = await db.execute(
+        select(Subscriptions.user_id).where(Subscriptions.plan_id == plan.id).distinct()
+    )
+    user_ids = result.scalars().all()
+
     await db.delete(plan)
     await db.commit()
+    await clear_entitlements(user_ids)
     logger.info("Subscription plan deleted successfully: plan_id=%s", plan_id)
     return {"message": "Subscription plan deleted successfully"}
 
 
-@router.post(
-    "/subscription/assign", status_code=status.HTTP_200_OK
-)  
+@router.post("/subscription/assign", status_code=status.HTTP_200_OK)
 async def subscriptions_assign(
     subscription: SubscriptionCreate,
     gym_id: str = Depends(get_gym_id),
@@ -195,7 +207,7 @@ async def subscriptions_assign(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Subscription plan not found",
         )
-   
+
     new_subscription = Subscriptions(
         user_id=subscription.user_id,
         plan_id=subscription.plan_id,
@@ -215,7 +227,18 @@ async def subscriptions_assign(
 
     db.add(new_subscription)
     db.add(payment)
+    await increment_daily_stats(
+        gym_id,
+        db,
+        new_subscriptions=1,
+        **{revenue_column(subscription.payment_method): plan.price},
+    )
     await db.commit()
+    await set_entitlement(subscription.user_id, new_subscription.end_date)
+
+    user = await db.get(Users, subscription.user_id)
+    if user:
+        await publish_user_change(gym_id, "update", user, active_sub=True)
     logger.info(
         "Subscription assigned successfully: user_id=%s, plan_id=%s",
         subscription.user_id,
@@ -260,7 +283,18 @@ async def daily_subscriptions_assign(
 
     db.add(daily_sub)
     db.add(payment)
+    await increment_daily_stats(
+        gym_id,
+        db,
+        daily_visits=1,
+        **{revenue_column(subscription.payment_method): subscription.amount},
+    )
     await db.commit()
+    await set_entitlement(subscription.user_id, daily_sub.subscription_date)
+
+    user = await db.get(Users, subscription.user_id)
+    if user:
+        await publish_user_change(gym_id, "update", user)
 
     logger.info(
         "Daily subscription assigned successfully | user_id=%s gym_id=%s date=%s",
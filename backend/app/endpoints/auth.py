@@ -6,7 +6,9 @@ from sqlalchemy.future import select
 from sqlalchemy import and_
 
 from ..logging_config import setup_logging
-from ..rate_limiter import rate_limiter
+from ..rate_limiter import rate_limiter, login_rate_limiter, login_ip_rate_limiter
+from ..cache import principal_cache
+from ..websocket import publish_user_change
 from ..dependancy import get_gym_id
 from ..utils import check_gym_status, get_active_subscription
 from ..database import get_db
@@ -66,8 +68,6 @@ async def register(
 
     user_data = user_in.model_dump(exclude={"password"})
 
-    hashed_password = await hash_password(user_in.password)
-
     user_data.update({"hashed_password": hashed_password, "gym_id": gym_id})
 
     logger.info(f"Creating new user with phone number: {user_in.phone_number}")
@@ -76,6 +76,7 @@ async def register(
 
     db.add(new_user)
     await db.commit()
+    await publish_user_change(gym_id, "insert", new_user, active_sub=False)
 
     logger.info(
         f"User registered successfully with phone number: {user_in.phone_number}"
@@ -87,7 +88,7 @@ async def register(
     "/login",
     status_code=status.HTTP_200_OK,
     response_model=Token,
-    dependencies=[Depends(rate_limiter)],
+    dependencies=[Depends(login_ip_rate_limiter), Depends(login_rate_limiter)],
 )
 async def login_user(
     user_in: UserLogin,
@@ -164,6 +165,8 @@ async def delete_user(user_id: str, db: AsyncSession = Depends(get_db)):
 
     await db.delete(user)
     await db.commit()
+    await principal_cache.invalidate(user.phone_number)
+    await publish_user_change(user.gym_id, "delete", user)
 
     logger.info(f"User with ID: {user_id} deleted successfully")
     return {"message": "User deleted successfully"}
@@ -176,6 +179,7 @@ async def update_user_information(
 ):
     result = await db.execute(select(Users).where(Users.id == user_info.user_id))
     user = result.scalars().first()
+    old_phone_number = user.phone_number
 
     if user_info.first_name is not None:
         user.first_name = user_info.first_name
@@ -187,6 +191,8 @@ async def update_user_information(
         user.phone_number = user_info.phone_number
 
     await db.commit()
+    await principal_cache.invalidate(old_phone_number)
+    await publish_user_change(user.gym_id, "update", user)
     return {"detail": "User information updated successfully"}
 
 
@@ -201,6 +207,7 @@ async def update_user_password(
     user.hashed_password = await hash_password(password.password)
 
     await db.commit()
+    await principal_cache.invalidate(user.phone_number)
     return {"detail": "Password updated successfully"}
 
 
@@ -1,34 +1,44 @@
 import logging
 
+import os
+import csv
 import json
 import io
+import tempfile
 
 from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
 from openpyxl.styles import Font
 
 from datetime import timedelta, date
 from dateutil.relativedelta import relativedelta
-from fastapi.responses import StreamingResponse
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import StreamingResponse, FileResponse
+from fastapi.concurrency import run_in_threadpool
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from starlette.background import BackgroundTask
 
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import and_, func
+from sqlalchemy import and_, func, cast, Date
 from sqlalchemy.orm import selectinload
 from sqlalchemy.future import select
 
 from ..logging_config import setup_logging
-from ..utils import fetch_profit_from_db, cache_time_for_linegraph
+from ..utils import (
+    fetch_profit_from_db,
+    cache_time_for_linegraph,
+    cache_time_for_barchart,
+    barchart_cache_key,
+)
+from ..stats import fetch_user_stats, fetch_subscription_stats
 from ..dependancy import get_gym_id
-from ..database import get_db
-from ..schemas.admin import PaymentResponse
+from ..database import get_db, async_session
+from ..schemas.admin import PaymentResponse, ExportFormat, EndedSubscriptionResponse
 from ..rate_limiter import redis
 from ..models import (
     Users,
-    Attendance,
     Subscriptions,
-    SubscriptionPlans,
     Payment,
-    DailySubscriptions,
+    GymDailyStats,
 )
 
 setup_logging()
@@ -45,41 +55,9 @@ async def get_dashboard_stats(
     gym_id: str = Depends(get_gym_id),
 ):
     logger.info("Fetching dashboard user stats for gym_id=%s", gym_id)
-    response = []
-
-    result1 = await db.execute(
-        select(func.count(Users.id)).where(
-            and_(
-                Users.role == "client",
-                Users.is_superuser == False,
-                Users.gym_id == gym_id,
-            )
-        )
-    )
-    total_active_users = result1.scalar()
-
-    result2 = await db.execute(
-        select(func.count(Users.id)).where(
-            and_(Users.role == "trainer", Users.gym_id == gym_id)
-        )
-    )
-    total_trainers = result2.scalar()
+    response = [await fetch_user_stats(gym_id, db)]
 
-    result3 = await db.execute(
-        select(func.count(Attendance.id)).where(
-            Attendance.date == func.current_date(), Attendance.gym_id == gym_id
-        )
-    )
-    today_attendance = result3.scalar()
-
-    response.append(
-        {
-            "total_active_users": total_active_users,
-            "total_trainers": total_trainers,
-            "today_attendance": today_attendance,
-        }
-    )
-    logger.info("User stats: %s", response)
+    logger.debug("User stats: %s", response)
     return response
 
 
@@ -91,30 +69,10 @@ async def get_subscription_stats(
     logger.info("Fetching subscription stats for gym_id=%s", gym_id)
     response = []
 
-    result1 = await db.execute(
-        select(func.count(Subscriptions.id)).where(
-            and_(
-                Subscriptions.is_active == True,
-                Subscriptions.gym_id == gym_id,
-                Subscriptions.end_date >= date.today(),
-            )
-        )
-    )
-    total_active_subscriptions = result1.scalar()
-
-    result = await db.execute(
-        select(SubscriptionPlans.type, func.count(Subscriptions.id))
-        .outerjoin(Subscriptions, Subscriptions.plan_id == SubscriptionPlans.id)
-        .where(
-            Subscriptions.is_active == True,
-            Subscriptions.gym_id == gym_id,
-            Subscriptions.end_date >= date.today(),
-        )
-        .group_by(SubscriptionPlans.type)
-    )
+    stats = await fetch_subscription_stats(gym_id, db)
+    total_active_subscriptions = stats["total_active_subscriptions"]
 
-    type_and_count = result.all()
-    for type, count in type_and_count:
+    for type, count in stats["by_type"]:
         response.append(
             {
                 "type": type,
@@ -132,7 +90,7 @@ async def get_subscription_stats(
             "total_active_subscriptions": total_active_subscriptions,
         }
     )
-    logger.info("Subscription stats: %s", response)
+    logger.debug("Subscription stats: %s", response)
     return response
 
 
@@ -144,9 +102,9 @@ async def get_total_profit_for_day(
 
     logger.info("Fetching total profit and daily/weekly clients for gym_id=%s", gym_id)
     result2 = await db.execute(
-        select(func.count(DailySubscriptions.id)).where(
-            DailySubscriptions.subscription_date == date.today(),
-            DailySubscriptions.gym_id == gym_id,
+        select(GymDailyStats.daily_visits).where(
+            GymDailyStats.day == date.today(),
+            GymDailyStats.gym_id == gym_id,
         )
     )
 
@@ -159,7 +117,7 @@ async def get_total_profit_for_day(
     weekly_clients = await redis.get(str(gym_id))
 
     if weekly_clients:
-        logger.info("Cache hit for weekly_clients: %s", weekly_clients)
+        logger.debug("Cache hit for weekly_clients: %s", weekly_clients)
         response["weekly_clients"] = json.loads(weekly_clients)
         return response
 
@@ -167,21 +125,15 @@ async def get_total_profit_for_day(
     end_date = date.today() - timedelta(days=1)
 
     result3 = await db.execute(
-        select(
-            func.date(DailySubscriptions.subscription_date),
-            func.count(DailySubscriptions.id),
-        )
-        .where(
+        select(GymDailyStats.day, GymDailyStats.daily_visits).where(
             and_(
-                DailySubscriptions.subscription_date.between(start_date, end_date),
-                DailySubscriptions.gym_id == gym_id,
+                GymDailyStats.day.between(start_date, end_date),
+                GymDailyStats.gym_id == gym_id,
             )
         )
-        .group_by(DailySubscriptions.subscription_date)
     )
 
-    weekly_visits = result3.mappings().all()
-    db_map = {row["date"]: row["count"] for row in weekly_visits}
+    db_map = {row.day: row.daily_visits for row in result3.all()}
 
     weekly_clients_list = []
     while start_date <= end_date:
@@ -209,49 +161,47 @@ async def get_monthly_payment_history(
     db: AsyncSession = Depends(get_db), gym_id: str = Depends(get_gym_id)
 ):
 
-    # response = await redis.get(settings.MONTHLY_PROFIT)
+    cache_key = barchart_cache_key(gym_id)
+    cached = await redis.get(cache_key)
 
-    # if response:
-    #     # print("Cache hit")
-    #     return json.loads(response)
+    if cached:
+        logger.info("Cache hit for monthly payment history: gym_id=%s", gym_id)
+        return json.loads(cached)
 
     logger.info("Fetching monthly payment history for gym_id=%s", gym_id)
     today = date.today()
     start_date = today.replace(day=1) - relativedelta(months=5)
     end_date = today.replace(day=1) - relativedelta(days=1)
 
+    month = cast(func.date_trunc("month", GymDailyStats.day), Date).label("month")
+    revenue = GymDailyStats.card_revenue + GymDailyStats.cash_revenue
     result = await db.execute(
-        select(Payment)
+        select(month, func.sum(revenue).label("profit"))
         .where(
-            Payment.payment_date.between(start_date, end_date), Payment.gym_id == gym_id
+            GymDailyStats.day.between(start_date, end_date),
+            GymDailyStats.gym_id == gym_id,
         )
-        .order_by(Payment.payment_date)
+        .group_by(month)
     )
+    db_map = {row.month: row.profit or 0 for row in result.all()}
 
-    payments = result.scalars().all()
-    for payment in payments:
-        print(payment.amount, payment.payment_date)
-
-    monthly_profit = {}
-    for payment in payments:
-        # Use year-month as key for proper chronological sorting
-        month_key = payment.payment_date.strftime("%Y-%m")
-        month_name = payment.payment_date.strftime("%B")
-        if month_key not in monthly_profit:
-            monthly_profit[month_key] = {"name": month_name, "profit": 0}
-        monthly_profit[month_key]["profit"] += payment.amount or 0
-
-    # Sort by year-month key (chronological order)
-    sorted_months = sorted(monthly_profit.items(), key=lambda x: x[0])
-
-    response = [
-        {"month": data["name"], "profit": data["profit"]} for _, data in sorted_months
-    ]
-    logger.info("Monthly payment history: %s", response)
+    # Zero-fill the closed months so the chart always has five bars
+    response = []
+    current = start_date
+    while current <= end_date:
+        response.append(
+            {"month": current.strftime("%B"), "profit": db_map.get(current, 0)}
+        )
+        current += relativedelta(months=1)
+
+    ttl = await cache_time_for_barchart(db)
+
+    await redis.set(cache_key, json.dumps(response), ex=ttl)  # cached until month end
+    logger.debug("Monthly payment history: %s", response)
     return response
 
 
-@router.get("/notifications")
+@router.get("/notifications", response_model=list[EndedSubscriptionResponse])
 async def get_ended_subscriptions(
     gym_id: str = Depends(get_gym_id), db: AsyncSession = Depends(get_db)
 ):
@@ -281,7 +231,7 @@ async def get_ended_subscriptions(
             }
         )
 
-    logger.info("Ended subscriptions: %s", response)
+    logger.debug("Ended subscriptions: %s", response)
     return response
 
 
@@ -326,66 +276,142 @@ async def get_profit(
         "weekly_profit": weekly_profit or 0,
         "monthly_profit": monthly_profit or 0,
     }
-    logger.info("Profit stats: %s", response)
+    logger.debug("Profit stats: %s", response)
     return response
 
 
-@router.get("/download/stats", status_code=status.HTTP_200_OK)
-async def download_stats(
-    gym_id: str = Depends(get_gym_id),
-    db: AsyncSession = Depends(get_db),
-):
-    logger.info("Downloading dashboard stats for gym_id=%s", gym_id)
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Dashboard Stats"
+EXPORT_HEADERS = [
+    "Full Name",
+    "Role",
+    "Phone Number",
+    "Subscription Start Date",
+    "Subscription End Date",
+]
+EXPORT_BATCH_SIZE = 1000
+XLSX_MEDIA_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
 
-    font = Font(size=14)
 
-    ws.append(
-        [
-            "Full Name",
-            "Role",
-            "Phone Number",
-            "Subscription Start Date",
-            "Subscription End Date",
-        ]
+async def iter_export_rows(gym_id: str):
+    """Yield subscription rows in batches through a server-side cursor."""
+    query = (
+        select(
+            Users.first_name,
+            Users.last_name,
+            Users.role,
+            Users.phone_number,
+            Subscriptions.start_date,
+            Subscriptions.end_date,
+        )
+        .join(Users, Subscriptions.user_id == Users.id)
+        .where(Subscriptions.gym_id == gym_id)
+        .execution_options(yield_per=EXPORT_BATCH_SIZE)
     )
+
+    # The response body outlives the request dependencies, so the stream
+    # gets its own session
+    async with async_session() as db:
+        result = await db.stream(query)
+        async for partition in result.partitions():
+            yield [
+                (
+                    f"{row.first_name} {row.last_name}",
+                    row.role,
+                    row.phone_number,
+                    row.start_date,
+                    row.end_date,
+                )
+                for row in partition
+            ]
+
+
+def render_csv(rows: list) -> str:
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    return buffer.getvalue()
+
+
+def render_ndjson(rows: list) -> str:
+    return "".join(
+        json.dumps(dict(zip(EXPORT_HEADERS, row)), default=str) + "\n" for row in rows
+    )
+
+
+def append_xlsx_rows(ws, font: Font, rows: list):
+    for row in rows:
+        cells = []
+        for value in row:
+            cell = WriteOnlyCell(ws, value=value)
+            cell.font = font
+            cells.append(cell)
+        ws.append(cells)
+
+
+async def stream_text_export(gym_id: str, export_format: ExportFormat):
+    if export_format == ExportFormat.CSV:
+        yield render_csv([EXPORT_HEADERS])
+        render = render_csv
+    else:
+        render = render_ndjson
+
+    async for rows in iter_export_rows(gym_id):
+        yield await run_in_threadpool(render, rows)
+
+
+async def build_xlsx_export(gym_id: str) -> str:
+    """
+    Write the export to a temporary file with openpyxl's write-only mode.
+
+    Memory stays flat, but an XLSX file is a zip archive whose parts are
+    only complete once the last row is written. The client therefore gets
+    its first byte only after the whole file is built. Large gyms should
+    use the streamed csv or ndjson formats.
+    """
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Dashboard Stats")
+    font = Font(size=14)
+
     ws.column_dimensions["A"].width = 25
     ws.column_dimensions["B"].width = 10
     ws.column_dimensions["C"].width = 25
     ws.column_dimensions["D"].width = 30
     ws.column_dimensions["E"].width = 30
 
-    result = await db.execute(
-        select(Subscriptions)
-        .options(selectinload(Subscriptions.user))
-        .where(Subscriptions.gym_id == gym_id)
-    )
-    subscriptions = result.scalars().all()
+    append_xlsx_rows(ws, font, [EXPORT_HEADERS])
+    async for rows in iter_export_rows(gym_id):
+        await run_in_threadpool(append_xlsx_rows, ws, font, rows)
 
-    for subscription in subscriptions:
-        ws.append(
-            [
-                subscription.user.full_name,
-                subscription.user.role,
-                subscription.user.phone_number,
-                subscription.start_date,
-                subscription.end_date,
-            ]
-        )
+    fd, path = tempfile.mkstemp(suffix=".xlsx")
+    os.close(fd)
+    await run_in_threadpool(wb.save, path)
+    return path
 
-    for row in ws.iter_rows():
-        for cell in row:
-            cell.font = font
 
-    stream = io.BytesIO()
-    wb.save(stream)
-    stream.seek(0)
+@router.get("/download/stats", status_code=status.HTTP_200_OK)
+async def download_stats(
+    format: ExportFormat = Query(ExportFormat.XLSX),
+    gym_id: str = Depends(get_gym_id),
+):
+    logger.info(
+        "Downloading dashboard stats for gym_id=%s, format=%s", gym_id, format.value
+    )
+
+    if format == ExportFormat.XLSX:
+        path = await build_xlsx_export(gym_id)
+        logger.info("Dashboard stats file generated for gym_id=%s", gym_id)
+        return FileResponse(
+            path,
+            media_type=XLSX_MEDIA_TYPE,
+            filename="dashboard_stats.xlsx",
+            background=BackgroundTask(os.remove, path),
+        )
 
-    logger.info("Dashboard stats file generated for gym_id=%s", gym_id)
+    media_type = "text/csv" if format == ExportFormat.CSV else "application/x-ndjson"
     return StreamingResponse(
-        stream,
-        media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-        headers={"Content-Disposition": 'attachment; filename="dashboard_stats.xlsx"'},
+        stream_text_export(gym_id, format),
+        media_type=media_type,
+        headers={
+            "Content-Disposition": (
+                f'attachment; filename="dashboard_stats.{format.value}"'
+            )
+        },
     )
@@ -0,0 +1,52 @@
+import asyncio
+import logging
+
+from fastapi import APIRouter, status
+from fastapi.responses import JSONResponse
+from sqlalchemy import text
+
+from ..database import engine
+from ..rate_limiter import redis
+from ..startup import startup_state
+
+logger = logging.getLogger("health")
+
+router = APIRouter(prefix="/health", tags=["Health"])
+
+READINESS_TIMEOUT = 2.0
+
+
+@router.get("/live", status_code=status.HTTP_200_OK)
+async def liveness():
+    return {"status": "ok"}
+
+
+@router.get("/ready", status_code=status.HTTP_200_OK)
+async def readiness():
+    if not startup_state.ready:
+        return JSONResponse(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            content={"status": "starting"},
+        )
+
+    async def ping_db():
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+
+    checks = {"database": ping_db(), "redis": redis.ping()}
+    results = await asyncio.gather(
+        *(asyncio.wait_for(check, READINESS_TIMEOUT) for check in checks.values()),
+        return_exceptions=True,
+    )
+
+    failed = [
+        name for name, result in zip(checks, results) if isinstance(result, Exception)
+    ]
+    if failed:
+        logger.warning("Readiness check failed: %s", ", ".join(failed))
+        return JSONResponse(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            content={"status": "unavailable", "failed": failed},
+        )
+
+    return {"status": "ready", "startup": startup_state.timings}
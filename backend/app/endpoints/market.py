@@ -1,21 +1,36 @@
 import os
 import uuid
-import aiofiles
 import logging
-
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form
-from sqlalchemy import select
+from collections import defaultdict
+
+from fastapi import (
+    APIRouter,
+    BackgroundTasks,
+    Depends,
+    HTTPException,
+    status,
+    UploadFile,
+    File,
+    Form,
+)
+from sqlalchemy import select, update, insert, values, column, exists, func, Integer
+from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from ..logging_config import setup_logging
 from ..dependancy import is_admin, get_gym_id
 from ..database import get_db
-from ..models import Products, ProductSales, Gyms
+from ..cache import gym_settings_cache
+from ..stats import increment_daily_stats
+from ..images import stage_image, store_image, remove_image, generate_thumbnail
+from ..models import Products, ProductSales
 from ..schemas.products import (
     ProductResponse,
     ProductSellRequest,
     ProductSaleResponse,
     MarketplaceStatusResponse,
+    BasketCheckoutRequest,
+    BasketCheckoutResponse,
 )
 
 setup_logging()
@@ -33,13 +48,12 @@ os.makedirs(UPLOAD_DIR, exist_ok=True)
 
 async def check_marketplace_enabled(gym_id: str, db: AsyncSession):
     """Check if marketplace is enabled for the gym"""
-    result = await db.execute(select(Gyms).where(Gyms.id == gym_id))
-    gym = result.scalars().first()
+    gym = await gym_settings_cache.get(gym_id, db)
     if not gym:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Zal topilmadi"
         )
-    if not gym.marketplace_enabled:
+    if not gym["marketplace_enabled"]:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Marketplace bu zal uchun yoqilmagan",
@@ -47,6 +61,39 @@ async def check_marketplace_enabled(gym_id: str, db: AsyncSession):
     return True
 
 
+async def lock_image(image_path: str, db: AsyncSession):
+    """Serialise changes to an image file's references until the transaction ends"""
+    await db.execute(select(func.pg_advisory_xact_lock(func.hashtext(image_path))))
+
+
+async def place_image(image: UploadFile, db: AsyncSession) -> str:
+    """
+    Store an upload and return its URL. The file's lock is held until the
+    caller commits, so a concurrent release cannot unlink it before the new
+    reference is visible.
+    """
+    temp_path, unique_filename = await stage_image(image, UPLOAD_DIR)
+    image_path = f"/uploads/products/{unique_filename}"
+    await lock_image(image_path, db)
+    await store_image(temp_path, UPLOAD_DIR, unique_filename)
+    return image_path
+
+
+async def release_image(image_path: str | None, db: AsyncSession):
+    """
+    Delete an image file once no product references it. Called after the
+    commit that dropped the reference; the check and the unlink run in their
+    own transaction under the file's lock.
+    """
+    if not image_path:
+        return
+    await lock_image(image_path, db)
+    result = await db.execute(select(exists().where(Products.image_path == image_path)))
+    if not result.scalar():
+        await remove_image(image_path)
+    await db.commit()
+
+
 @router.get("/status", response_model=MarketplaceStatusResponse)
 async def get_marketplace_status(
     gym_id: str = Depends(get_gym_id),
@@ -54,13 +101,12 @@ async def get_marketplace_status(
 ):
     """Get marketplace enabled status for the gym"""
     logger.info("Checking marketplace status for gym_id=%s", gym_id)
-    result = await db.execute(select(Gyms).where(Gyms.id == gym_id))
-    gym = result.scalars().first()
+    gym = await gym_settings_cache.get(gym_id, db)
     if not gym:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Zal topilmadi"
         )
-    return {"marketplace_enabled": gym.marketplace_enabled}
+    return {"marketplace_enabled": gym["marketplace_enabled"]}
 
 
 @router.get("/products", response_model=list[ProductResponse])
@@ -86,6 +132,7 @@ async def get_products(
     "/products", status_code=status.HTTP_201_CREATED, response_model=ProductResponse
 )
 async def create_product(
+    background_tasks: BackgroundTasks,
     name: str = Form(...),
     selling_price: int = Form(...),
     purchase_price: int = Form(...),
@@ -101,17 +148,8 @@ async def create_product(
 
     image_path = None
     if image and image.filename:
-        # Generate unique filename
-        file_extension = os.path.splitext(image.filename)[1]
-        unique_filename = f"{uuid.uuid4()}{file_extension}"
-        file_path = os.path.join(UPLOAD_DIR, unique_filename)
-
-        # Save the file
-        content = await image.read()
-        async with aiofiles.open(file_path, "wb") as f:
-            await f.write(content)
-
-        image_path = f"/uploads/products/{unique_filename}"
+        image_path = await place_image(image, db)
+        background_tasks.add_task(generate_thumbnail, image_path)
         logger.info("Image saved: %s", image_path)
 
     new_product = Products(
@@ -135,6 +173,7 @@ async def create_product(
 
 @router.put("/products/{product_id}", response_model=ProductResponse)
 async def update_product(
+    background_tasks: BackgroundTasks,
     product_id: str,
     name: str = Form(None),
     selling_price: int = Form(None),
@@ -174,28 +213,22 @@ async def update_product(
         product.supplier_name = supplier_name
 
     # Handle image upload
+    old_image_path = None
     if image and image.filename:
-        # Delete old image if exists
-        if product.image_path:
-            old_file_path = os.path.join(
-                os.path.dirname(os.path.dirname(__file__)),
-                product.image_path.lstrip("/"),
-            )
-            if os.path.exists(old_file_path):
-                os.remove(old_file_path)
+        # Save new image first so a rejected upload keeps the old one
+        image_path = await place_image(image, db)
+        if product.image_path != image_path:
+            old_image_path = product.image_path
 
-        # Save new image
-        file_extension = os.path.splitext(image.filename)[1]
-        unique_filename = f"{uuid.uuid4()}{file_extension}"
-        file_path = os.path.join(UPLOAD_DIR, unique_filename)
-
-        content = await image.read()
-        async with aiofiles.open(file_path, "wb") as f:
-            await f.write(content)
-
-        product.image_path = f"/uploads/products/{unique_filename}"
+        product.image_path = image_path
+        # Cleared until the background task has written the new thumbnail
+        product.thumbnail_path = None
+        background_tasks.add_task(generate_thumbnail, product.image_path)
 
     await db.commit()
+
+    # Delete old image if it exists and nothing else uses it
+    await release_image(old_image_path, db)
     await db.refresh(product)
 
     logger.info("Product updated successfully: id=%s", product.id)
@@ -221,17 +254,13 @@ async def delete_product(
             status_code=status.HTTP_404_NOT_FOUND, detail="Mahsulot topilmadi"
         )
 
-    # Delete image file if exists
-    if product.image_path:
-        old_file_path = os.path.join(
-            os.path.dirname(os.path.dirname(__file__)), product.image_path.lstrip("/")
-        )
-        if os.path.exists(old_file_path):
-            os.remove(old_file_path)
-
+    image_path = product.image_path
     await db.delete(product)
     await db.commit()
 
+    # Delete image file if exists and nothing else uses it
+    await release_image(image_path, db)
+
     logger.info("Product deleted successfully: id=%s", product_id)
     return {"message": "Mahsulot muvaffaqiyatli o'chirildi"}
 
@@ -251,21 +280,34 @@ async def sell_product(
     )
     await check_marketplace_enabled(gym_id, db)
 
+    # Conditional decrement: the row is only updated while enough stock
+    # remains, so concurrent sellers can never drive it negative
     result = await db.execute(
-        select(Products).where(
-            Products.id == sale.product_id, Products.gym_id == gym_id
+        update(Products)
+        .where(
+            Products.id == sale.product_id,
+            Products.gym_id == gym_id,
+            Products.current_amount >= sale.quantity,
         )
+        .values(current_amount=Products.current_amount - sale.quantity)
+        .returning(Products.id, Products.selling_price, Products.current_amount)
     )
-    product = result.scalars().first()
+    product = result.first()
+
     if not product:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND, detail="Mahsulot topilmadi"
+        result = await db.execute(
+            select(Products.current_amount).where(
+                Products.id == sale.product_id, Products.gym_id == gym_id
+            )
         )
-
-    if product.current_amount < sale.quantity:
+        current_amount = result.scalar()
+        if current_amount is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND, detail="Mahsulot topilmadi"
+            )
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Yetarli mahsulot yo'q. Mavjud: {product.current_amount}",
+            detail=f"Yetarli mahsulot yo'q. Mavjud: {current_amount}",
         )
 
     total_price = product.selling_price * sale.quantity
@@ -279,12 +321,9 @@ async def sell_product(
         gym_id=gym_id,
     )
 
-    # Subtract from current amount
-    product.current_amount -= sale.quantity
-
     db.add(new_sale)
+    await increment_daily_stats(gym_id, db, market_revenue=total_price)
     await db.commit()
-    await db.refresh(new_sale)
 
     logger.info(
         "Product sold successfully: sale_id=%s, quantity=%s, total_price=%s",
@@ -301,6 +340,114 @@ async def sell_product(
     }
 
 
+@router.post(
+    "/checkout",
+    status_code=status.HTTP_201_CREATED,
+    response_model=BasketCheckoutResponse,
+)
+async def checkout_basket(
+    basket: BasketCheckoutRequest,
+    gym_id: str = Depends(get_gym_id),
+    db: AsyncSession = Depends(get_db),
+):
+    """Sell several products in one transaction"""
+    logger.info("Checking out basket: items=%d, gym_id=%s", len(basket.items), gym_id)
+    await check_marketplace_enabled(gym_id, db)
+
+    # Merge repeated lines so each product is locked and decremented once
+    quantities = defaultdict(int)
+    for item in basket.items:
+        quantities[item.product_id] += item.quantity
+
+    # Lock in id order so concurrent baskets cannot deadlock each other
+    result = await db.execute(
+        select(Products)
+        .where(Products.id.in_(quantities), Products.gym_id == gym_id)
+        .order_by(Products.id)
+        .with_for_update()
+    )
+    products = {product.id: product for product in result.scalars().all()}
+
+    missing = [
+        str(product_id) for product_id in quantities if product_id not in products
+    ]
+    if missing:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Mahsulot topilmadi: {', '.join(missing)}",
+        )
+
+    short = [
+        f"{products[product_id].name} (mavjud: {products[product_id].current_amount})"
+        for product_id, quantity in quantities.items()
+        if products[product_id].current_amount < quantity
+    ]
+    if short:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Yetarli mahsulot yo'q: {', '.join(short)}",
+        )
+
+    basket_values = values(
+        column("product_id", UUID(as_uuid=True)),
+        column("quantity", Integer),
+        name="basket",
+    ).data(list(quantities.items()))
+
+    await db.execute(
+        update(Products)
+        .where(Products.id == basket_values.c.product_id)
+        .values(current_amount=Products.current_amount - basket_values.c.quantity)
+        .execution_options(synchronize_session=False)
+    )
+
+    lines = []
+    for product_id, quantity in quantities.items():
+        product = products[product_id]
+        lines.append(
+            {
+                "sale_id": uuid.uuid4(),
+                "product_id": product_id,
+                "product_name": product.name,
+                "quantity": quantity,
+                "total_price": product.selling_price * quantity,
+                "remaining_amount": product.current_amount - quantity,
+            }
+        )
+
+    await db.execute(
+        insert(ProductSales).values(
+            [
+                {
+                    "id": line["sale_id"],
+                    "product_id": line["product_id"],
+                    "quantity": line["quantity"],
+                    "total_price": line["total_price"],
+                    "payment_method": basket.payment_method.value,
+                    "gym_id": gym_id,
+                }
+                for line in lines
+            ]
+        )
+    )
+
+    total_price = sum(line["total_price"] for line in lines)
+    await increment_daily_stats(gym_id, db, market_revenue=total_price)
+    await db.commit()
+
+    logger.info(
+        "Basket checked out: lines=%d, total_price=%s, gym_id=%s",
+        len(lines),
+        total_price,
+        gym_id,
+    )
+    return {
+        "message": "Mahsulotlar muvaffaqiyatli sotildi",
+        "total_price": total_price,
+        "lines": lines,
+    }
+
+
 # not used
 @router.get("/sales", response_model=list[ProductSaleResponse])
 async def get_sales(
@@ -0,0 +1,24 @@
+from fastapi import APIRouter, Depends, status
+from fastapi.responses import PlainTextResponse
+
+from ..database import pool_stats
+from ..dependancy import verify_metrics_token
+from ..metrics import render
+from ..metrics_store import metrics_store
+
+router = APIRouter(
+    prefix="/metrics",
+    tags=["Metrics"],
+    dependencies=[Depends(verify_metrics_token)],
+)
+
+
+@router.get("", status_code=status.HTTP_200_OK, response_class=PlainTextResponse)
+async def get_metrics():
+    families = await metrics_store.collect_all()
+    return PlainTextResponse(render(families), media_type="text/plain; version=0.0.4")
+
+
+@router.get("/pool", status_code=status.HTTP_200_OK)
+async def get_pool_metrics():
+    return pool_stats()
@@ -7,9 +7,10 @@ from sqlalchemy.future import select
 
 from ..logging_config import setup_logging
 
-from ..utils import is_superuser_exists
+from ..utils import is_superuser_exists, clear_entitlements
+from ..cache import principal_cache, gym_settings_cache
 from ..database import get_db
-from ..models import Users, Gyms
+from ..models import Users, Gyms, Subscriptions, DailySubscriptions
 from ..security import (
     hash_password,
 )
@@ -137,12 +138,16 @@ async def update_gym(id: str, db: AsyncSession = Depends(get_db)):
     if gym.is_active:
         gym.is_active = False
         await db.commit()
+        await principal_cache.invalidate_gym(gym.id)
+        await gym_settings_cache.invalidate(gym.id)
         logger.info("Gym deactivated: gym_id=%s", id)
         return {"message": "Zal muvaffaqiyatli yangilandi"}
 
     gym.is_active = True
 
     await db.commit()
+    await principal_cache.invalidate_gym(gym.id)
+    await gym_settings_cache.invalidate(gym.id)
     logger.info("Gym activated: gym_id=%s", id)
     return {"message": "Zal muvaffaqiyatli yangilandi"}
 
@@ -169,8 +174,23 @@ async def delete_gym(gym_id: str, db: AsyncSession = Depends(get_db)):
         logger.info("Deleting admin for gym: admin_id=%s, gym_id=%s", admin.id, gym_id)
         await db.delete(admin)
 
+    # Subscriptions cascade with the gym; their cached entitlements must go too
+    result = await db.execute(
+        select(Subscriptions.user_id)
+        .where(Subscriptions.gym_id == gym.id)
+        .union(
+            select(DailySubscriptions.user_id).where(
+                DailySubscriptions.gym_id == gym.id
+            )
+        )
+    )
+    user_ids = result.scalars().all()
+
     await db.delete(gym)
     await db.commit()
+    await principal_cache.invalidate_gym(gym_id)
+    await gym_settings_cache.invalidate(gym_id)
+    await clear_entitlements(user_ids)
 
     logger.info("Gym deleted successfully: gym_id=%s", gym_id)
     return {"message": "Zal muvaffaqiyatli o'chirildi"}
@@ -207,6 +227,7 @@ async def toggle_marketplace_status(gym_id: str, db: AsyncSession = Depends(get_
 
     gym.marketplace_enabled = not gym.marketplace_enabled
     await db.commit()
+    await gym_settings_cache.invalidate(gym.id)
 
     logger.info("Marketplace for gym_id=%s", gym_id)
     return {
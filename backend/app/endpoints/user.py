@@ -1,19 +1,36 @@
 import json
 import logging
+from uuid import UUID
 from datetime import date
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-
-from ..utils import get_active_subscription
+from redis.exceptions import RedisError
+
+from ..utils import (
+    get_active_subscription,
+    record_attendance,
+    fetch_entitled_scans,
+    insert_attendance_batch,
+    scan_day,
+)
 from ..logging_config import setup_logging
-from ..schemas.users import UserListResponse
-from ..schemas.admin import AttendanceResponse
+from ..schemas.users import (
+    CurrentUserResponse,
+    UserDetailResponse,
+    UserListResponse,
+)
+from ..schemas.admin import (
+    AttendanceResponse,
+    AttendanceBatchCreate,
+    AttendanceScanResult,
+    ScanStatus,
+)
 from ..models import Users, Subscriptions, Attendance
-from ..websocket import manager
+from ..websocket import manager, get_users_version
 from ..database import get_db
-from ..dependancy import get_current_user, get_gym_id
+from ..dependancy import get_current_user, get_gym_id, is_admin
 
-from sqlalchemy import and_
+from sqlalchemy import and_, func
 from sqlalchemy.orm import selectinload
 from fastapi import (
     APIRouter,
@@ -23,9 +40,9 @@ from fastapi import (
     WebSocketDisconnect,
     Query,
     Depends,
+    Response,
 )
 
-
 setup_logging()
 logger = logging.getLogger("user_file")
 
@@ -34,11 +51,22 @@ router = APIRouter(prefix="/users", tags=["User Management"])
 
 @router.get("", status_code=status.HTTP_200_OK, response_model=list[UserListResponse])
 async def get_all_users(
+    response: Response,
     q: str = Query(None),
     active_sub: bool = Query(None),
+    limit: int = Query(None, ge=1, le=500),
+    after: UUID = Query(None),
+    include_total: bool = Query(False),
     gym_id: str = Depends(get_gym_id),
     db: AsyncSession = Depends(get_db),
 ):
+    """
+    List the gym's clients, optionally paginated by keyset on the user id.
+
+    When `limit` is given and more rows may follow, the id to pass as
+    `after` for the next page is returned in the X-Next-Cursor header.
+    `include_total` adds the unpaginated match count as X-Total-Count.
+    """
     logger.info("Fetching all users for gym_id=%s", gym_id)
     query = select(Users).where(
         and_(
@@ -46,20 +74,37 @@ async def get_all_users(
         )
     )
     if active_sub:
-        query = query.join(Users.subscriptions).where(
-            Subscriptions.is_active == active_sub
+        # EXISTS instead of a join so users with several subscriptions
+        # are returned once
+        query = query.where(
+            Users.subscriptions.any(Subscriptions.is_active == active_sub)
         )
     if q:
+        q = q.strip()
         query = query.where(
             (Users.first_name.ilike(f"%{q}%"))
             | (Users.last_name.ilike(f"%{q}%"))
             | (Users.phone_number.ilike(f"%{q}%"))
         )
+
+    if include_total:
+        total = await db.execute(select(func.count()).select_from(query.subquery()))
+        response.headers["X-Total-Count"] = str(total.scalar())
+
+    query = query.order_by(Users.id)
+    if after:
+        query = query.where(Users.id > after)
+    if limit:
+        query = query.limit(limit)
+
     users = (await db.execute(query)).scalars().all()
+
+    if limit and len(users) == limit:
+        response.headers["X-Next-Cursor"] = str(users[-1].id)
     return users
 
 
-@router.get("/me", status_code=status.HTTP_200_OK)
+@router.get("/me", status_code=status.HTTP_200_OK, response_model=CurrentUserResponse)
 async def get_current_user_info(
     user: Users = Depends(get_current_user), db: AsyncSession = Depends(get_db)
 ):
@@ -82,8 +127,8 @@ async def get_current_user_info(
             detail="User not found",
         )
 
-    response = {
-        "id": str(user_data.id),
+    return {
+        "id": user_data.id,
         "first_name": user_data.first_name,
         "last_name": user_data.last_name,
         "phone_number": user_data.phone_number,
@@ -91,50 +136,10 @@ async def get_current_user_info(
         "gender": user_data.gender,
         "role": user_data.role,
         "is_active": user_data.is_active,
-        "payments": (
-            [
-                {
-                    "amount": pay.amount,
-                    "payment_date": pay.payment_date,
-                    "payment_method": pay.payment_method,
-                }
-                for pay in user_data.payments
-            ]
-            if user_data.payments
-            else []
-        ),
-        "subscriptions": (
-            [
-                {
-                    "start_date": sub.start_date,
-                    "end_date": sub.end_date,
-                    "days_left": (
-                        (sub.end_date - date.today()).days if sub.end_date else 0
-                    ),
-                    "plan": (
-                        {
-                            "type": sub.plan.type if sub.plan else None,
-                            "price": sub.plan.price if sub.plan else 0,
-                            "duration_days": sub.plan.duration_days if sub.plan else 0,
-                            "is_active": sub.plan.is_active if sub.plan else False,
-                        }
-                        if sub.plan
-                        else None
-                    ),
-                }
-                for sub in user_data.subscriptions
-            ]
-            if user_data.subscriptions
-            else []
-        ),
-        "attendances": [
-            {
-                "date": attendance.date.isoformat() if attendance.date else None,
-            }
-            for attendance in user.attendances[:3]
-        ],
+        "payments": user_data.payments,
+        "subscriptions": user_data.subscriptions,
+        "attendances": user_data.attendances[:3],
     }
-    return response
 
 
 @router.get(
@@ -185,7 +190,9 @@ async def get_trainer_by_id(
     return response
 
 
-@router.get("/{user_id}", status_code=status.HTTP_200_OK)
+@router.get(
+    "/{user_id}", status_code=status.HTTP_200_OK, response_model=UserDetailResponse
+)
 async def get_user(
     user_id: str, gym_id: str = Depends(get_gym_id), db: AsyncSession = Depends(get_db)
 ):
@@ -207,43 +214,17 @@ async def get_user(
             detail="User not found",
         )
 
-    response = {
+    return {
         "first_name": user.first_name,
         "last_name": user.last_name,
         "phone_number": user.phone_number,
         "date_of_birth": user.date_of_birth,
         "gender": user.gender,
         "is_active": user.is_active,
-        "payments": [
-            {
-                "amount": pay.amount,
-                "payment_date": pay.payment_date,
-                "payment_method": pay.payment_method,
-            }
-            for pay in user.payments
-        ],
-        "subscriptions": [
-            {
-                "start_date": sub.start_date,
-                "end_date": sub.end_date,
-                "days_left": (sub.end_date - date.today()).days,
-                "plan": {
-                    "type": sub.plan.type,
-                    "price": sub.plan.price,
-                    "duration_days": sub.plan.duration_days,
-                    "is_active": sub.plan.is_active,
-                },
-            }
-            for sub in user.subscriptions
-        ],
-        "attendances": [
-            {
-                "date": attendance.date.isoformat(),
-            }
-            for attendance in user.attendances[:3]
-        ],
+        "payments": user.payments,
+        "subscriptions": user.subscriptions,
+        "attendances": user.attendances[:3],
     }
-    return response
 
 
 @router.get("/trainers/{trainer_id}/clients/", status_code=status.HTTP_200_OK)
@@ -283,29 +264,20 @@ async def create_attendance(
     gym_id: str = Depends(get_gym_id),
     db: AsyncSession = Depends(get_db),
 ):
-    is_active = await get_active_subscription(current_user.id, db)
-
-    if not is_active:
-        logger.warning(
-            "User does not have an active subscription: user_id=%s", current_user.id
-        )
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="You do not have an active subscription",
-        )
-    
-    result = await db.execute(
-        select(Attendance).where(
-            and_(
-                Attendance.user_id == current_user.id,
-                Attendance.date == date.today(),
-                Attendance.gym_id == gym_id,
+    checked_in = await record_attendance(current_user.id, gym_id, db)
+
+    if not checked_in:
+        # Nothing was inserted; only now find out which check failed
+        if not await get_active_subscription(current_user.id, db):
+            logger.warning(
+                "User does not have an active subscription: user_id=%s",
+                current_user.id,
+            )
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="You do not have an active subscription",
             )
-        )
-    )
-    attendance = result.scalars().first()
 
-    if attendance:
         logger.warning(
             "Attendance already marked: user_id=%s, gym_id=%s", current_user.id, gym_id
         )
@@ -314,13 +286,63 @@ async def create_attendance(
             detail="You already in an attendance",
         )
 
-    new_attendance = Attendance(user_id=current_user.id, gym_id=gym_id)
-    db.add(new_attendance)
     await db.commit()
 
     return {"message": "Attendance marked successfully"}
 
 
+@router.post(
+    "/attendance/batch",
+    status_code=status.HTTP_200_OK,
+    response_model=list[AttendanceScanResult],
+    dependencies=[Depends(is_admin)],
+)
+async def create_attendance_batch(
+    batch: AttendanceBatchCreate,
+    gym_id: str = Depends(get_gym_id),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Ingest check-ins buffered by offline door controllers.
+
+    Scans are checked against the subscriptions valid on their own day,
+    inserted in bulk, and reported back one result per scan in request
+    order.
+    """
+    logger.info("Ingesting %d attendance scans for gym_id=%s", len(batch.scans), gym_id)
+
+    pairs = list(
+        dict.fromkeys((scan.user_id, scan_day(scan.timestamp)) for scan in batch.scans)
+    )
+    entitled = await fetch_entitled_scans(pairs, gym_id, db)
+    inserted = await insert_attendance_batch(
+        [pair for pair in pairs if pair in entitled], gym_id, db
+    )
+    await db.commit()
+
+    response = []
+    for scan in batch.scans:
+        pair = (scan.user_id, scan_day(scan.timestamp))
+        if pair not in entitled:
+            scan_status = ScanStatus.NOT_ENTITLED
+        elif pair in inserted:
+            scan_status = ScanStatus.CHECKED_IN
+            # Later scans of the same user on the same day are duplicates
+            inserted.discard(pair)
+        else:
+            scan_status = ScanStatus.DUPLICATE
+        response.append(
+            {
+                "user_id": scan.user_id,
+                "timestamp": scan.timestamp,
+                "status": scan_status,
+            }
+        )
+
+    logger.info("Attendance batch ingested for gym_id=%s", gym_id)
+    return response
+
+
 @router.get(
     "/attendance/list/",
     status_code=status.HTTP_200_OK,
@@ -342,7 +364,7 @@ async def get_attendance(
 async def websocket_trainers_endpoint(
     websocket: WebSocket, db: AsyncSession = Depends(get_db)
 ):
-   
+
     await manager.connect(websocket)
 
     try:
@@ -377,21 +399,36 @@ async def websocket_endpoint(websocket: WebSocket, db: AsyncSession = Depends(ge
         while True:
             data = await websocket.receive_text()
             message = json.loads(data)
+            # A "users" message subscribes the socket to its gym's change feed
+            # and returns a versioned snapshot; later changes arrive as
+            # "users.delta" messages and the client resyncs on a version gap
             if message.get("type") == "users":
+                gym_id = message.get("gym_id")
+                manager.join(websocket, gym_id)
+                try:
+                    version = await get_users_version(gym_id)
+                except RedisError:
+                    # No version to anchor deltas to; the client resyncs on
+                    # the next one
+                    version = None
+
                 query = select(Users).where(
                     and_(
                         Users.is_superuser == False,
                         Users.role == "client",
-                        Users.gym_id == message.get("gym_id"),
+                        Users.gym_id == gym_id,
                     )
                 )
                 result = await db.execute(query)
                 users = result.scalars().all()
 
                 users_data = [
-                    UserListResponse.model_validate(user).model_dump() for user in users
+                    UserListResponse.model_validate(user).model_dump(mode="json")
+                    for user in users
                 ]
 
-                await manager.broadcast({"type": "users", "data": users_data})
+                await websocket.send_json(
+                    {"type": "users", "version": version, "data": users_data}
+                )
     except WebSocketDisconnect:
         await manager.disconnect(websocket)
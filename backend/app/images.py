@@ -0,0 +1,245 @@
+import os
+import re
+import uuid
+import asyncio
+import hashlib
+import logging
+from concurrent.futures import ProcessPoolExecutor
+
+import aiofiles
+import aiofiles.os
+from fastapi import HTTPException, UploadFile, status
+from fastapi.staticfiles import StaticFiles
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, JSONResponse
+from starlette.staticfiles import NotModifiedResponse
+from PIL import Image
+from sqlalchemy import update
+
+from .config import settings
+from .database import async_session
+from .models import Products
+
+logger = logging.getLogger("images")
+
+UPLOADS_ROOT = os.path.join(os.path.dirname(__file__), "uploads")
+CHUNK_SIZE = 64 * 1024
+THUMBNAIL_SIZE = (256, 256)
+CONTENT_HASH_NAME = re.compile(r"[0-9a-f]{64}")
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+# Older uploads are UUID-named and not content-addressed, so browsers must
+# revalidate them; Starlette's ETag/Last-Modified turn that into a 304
+REVALIDATE_CACHE_CONTROL = "public, no-cache"
+
+# Magic bytes of the image formats accepted for product photos
+IMAGE_SIGNATURES = (
+    (b"\xff\xd8\xff", ".jpg"),
+    (b"\x89PNG\r\n\x1a\n", ".png"),
+    (b"GIF87a", ".gif"),
+    (b"GIF89a", ".gif"),
+)
+
+_thumbnail_pool: ProcessPoolExecutor | None = None
+
+
+def sniff_image_extension(header: bytes) -> str | None:
+    for signature, extension in IMAGE_SIGNATURES:
+        if header.startswith(signature):
+            return extension
+    if header[:4] == b"RIFF" and header[8:12] == b"WEBP":
+        return ".webp"
+    return None
+
+
+def thumbnail_url(image_path: str | None) -> str | None:
+    """Public URL of the WebP thumbnail generated for `image_path`."""
+    if not image_path:
+        return None
+    directory, filename = image_path.rsplit("/", 1)
+    return f"{directory}/thumbs/{os.path.splitext(filename)[0]}.webp"
+
+
+def url_to_path(url: str) -> str:
+    return os.path.join(UPLOADS_ROOT, url.removeprefix("/uploads/"))
+
+
+async def stage_image(image: UploadFile, directory: str) -> tuple[str, str]:
+    """
+    Stream an upload to a temporary file in `directory` in chunks and
+    return `(temp_path, filename)`; `store_image` moves it into place.
+
+    The type is taken from the file's magic bytes rather than the client's
+    filename or content type, and the upload is aborted with 413 once it
+    exceeds PRODUCT_IMAGE_MAX_BYTES. Files are named by the SHA-256 of
+    their content, so re-uploading an identical image reuses the stored
+    file; callers must check for other references before deleting one.
+    """
+    header = await image.read(CHUNK_SIZE)
+    extension = sniff_image_extension(header)
+    if extension is None:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail="Rasm formati qo'llab-quvvatlanmaydi",
+        )
+
+    temp_path = os.path.join(directory, f"{uuid.uuid4()}.part")
+    digest = hashlib.sha256()
+    size = 0
+
+    try:
+        async with aiofiles.open(temp_path, "wb") as f:
+            chunk = header
+            while chunk:
+                size += len(chunk)
+                if size > settings.PRODUCT_IMAGE_MAX_BYTES:
+                    raise HTTPException(
+                        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                        detail="Rasm hajmi juda katta",
+                    )
+                digest.update(chunk)
+                await f.write(chunk)
+                chunk = await image.read(CHUNK_SIZE)
+    except HTTPException:
+        await remove_file(temp_path)
+        raise
+
+    return temp_path, f"{digest.hexdigest()}{extension}"
+
+
+async def store_image(temp_path: str, directory: str, filename: str):
+    """Move a staged upload into place, reusing an identical stored file."""
+    file_path = os.path.join(directory, filename)
+
+    if await aiofiles.os.path.exists(file_path):
+        await remove_file(temp_path)
+    else:
+        await aiofiles.os.replace(temp_path, file_path)
+
+
+async def remove_file(file_path: str):
+    try:
+        await aiofiles.os.remove(file_path)
+    except FileNotFoundError:
+        pass
+
+
+async def remove_image(image_path: str | None):
+    """Delete an uploaded image and its thumbnail given the stored URL."""
+    if not image_path:
+        return
+    await remove_file(url_to_path(image_path))
+    await remove_file(url_to_path(thumbnail_url(image_path)))
+
+
+def make_thumbnail(source: str, target: str):
+    # Content-addressed names mean an existing thumbnail is already correct
+    if os.path.exists(target):
+        return
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    with Image.open(source) as img:
+        img.thumbnail(THUMBNAIL_SIZE)
+        img.save(target, "WEBP", quality=80)
+
+
+def get_thumbnail_pool() -> ProcessPoolExecutor:
+    global _thumbnail_pool
+    if _thumbnail_pool is None:
+        _thumbnail_pool = ProcessPoolExecutor(max_workers=settings.THUMBNAIL_WORKERS)
+    return _thumbnail_pool
+
+
+async def shutdown_thumbnail_pool():
+    """
+    Stop the thumbnail workers on shutdown. Queued thumbnails are dropped;
+    products without one keep showing the full image.
+    """
+    global _thumbnail_pool
+    if _thumbnail_pool is None:
+        return
+    pool, _thumbnail_pool = _thumbnail_pool, None
+    # Waiting for running resizes would block the event loop
+    await asyncio.to_thread(pool.shutdown, cancel_futures=True)
+
+
+async def generate_thumbnail(image_path: str):
+    """
+    Background task: resize the uploaded image to a WebP thumbnail and
+    record it on every product using the image.
+    """
+    loop = asyncio.get_running_loop()
+    thumbnail_path = thumbnail_url(image_path)
+    try:
+        await loop.run_in_executor(
+            get_thumbnail_pool(),
+            make_thumbnail,
+            url_to_path(image_path),
+            url_to_path(thumbnail_path),
+        )
+    except Exception:
+        logger.exception("Thumbnail generation failed for %s", image_path)
+        return
+
+    async with async_session() as db:
+        await db.execute(
+            update(Products)
+            .where(Products.image_path == image_path)
+            .values(thumbnail_path=thumbnail_path)
+        )
+        await db.commit()
+
+
+class UploadSizeLimitMiddleware:
+    """
+    Reject multipart uploads whose Content-Length already exceeds the image
+    limit, before Starlette reads and spools the body. Bodies without the
+    header are still capped per file by `stage_image`.
+    """
+
+    def __init__(self, app, max_bytes: int):
+        self.app = app
+        self.max_bytes = max_bytes
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http":
+            headers = Headers(scope=scope)
+            content_length = headers.get("content-length", "")
+            if (
+                headers.get("content-type", "").startswith("multipart/form-data")
+                and content_length.isdigit()
+                and int(content_length) > self.max_bytes
+            ):
+                response = JSONResponse(
+                    {"detail": "Rasm hajmi juda katta"},
+                    status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                )
+                await response(scope, receive, send)
+                return
+        await self.app(scope, receive, send)
+
+
+class UploadsStaticFiles(StaticFiles):
+    """
+    Static files for /uploads with long-lived caching.
+
+    Content-hash named files and their thumbnails can never change under
+    the same name, so they are marked immutable and get a strong ETag
+    equal to their hash. Anything else is revalidated on every use.
+    """
+
+    def file_response(self, full_path, stat_result, scope, status_code=200):
+        request_headers = Headers(scope=scope)
+
+        response = FileResponse(
+            full_path, status_code=status_code, stat_result=stat_result
+        )
+
+        name = os.path.splitext(os.path.basename(full_path))[0]
+        if CONTENT_HASH_NAME.fullmatch(name):
+            response.headers["cache-control"] = IMMUTABLE_CACHE_CONTROL
+            response.headers["etag"] = f'"{name}"'
+        else:
+            response.headers["cache-control"] = REVALIDATE_CACHE_CONTROL
+
+        if self.is_not_modified(response.headers, request_headers):
+            return NotModifiedResponse(response.headers)
+        return response
@@ -1,30 +1,121 @@
+import os
+import sys
+import copy
+import json
+import queue
+import atexit
+import random
 import logging
-import logging.config
-
-LOGGING_CONFIG = {
-    "version": 1,
-    "disable_existing_loggers": False,
-    "formatters": {
-        "default": {"format": "%(asctime)s - %(name)s - %(levelname)s - %(message)s"},
-    },
-    "handlers": {
-        "console": {
-            "class": "logging.StreamHandler",
-            "formatter": "default",
-            "stream": "ext://sys.stdout",
-        },
-        "file": {
-            "class": "logging.FileHandler",
-            "formatter": "default",
-            "filename": "app.log",
-        },
-    },
-    "root": {
-        "level": "INFO",
-        "handlers": ["console", "file"],
-    },
-}
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+from .config import settings
+
+DEFAULT_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+
+_listener: QueueListener | None = None
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        data = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        if record.exc_info:
+            data["exc_info"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            data["exc_info"] = record.exc_text
+        return json.dumps(data, default=str)
+
+
+class TracebackQueueHandler(QueueHandler):
+    """
+    QueueHandler whose records keep the traceback apart from the message.
+
+    The stock prepare() folds the traceback into `msg` and clears exc_info,
+    so JSON logs would carry it inside "message". Here it is rendered to
+    exc_text instead, which both formatters pick up on the listener side.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+class InfoSamplingFilter(logging.Filter):
+    """Keep a `rate` fraction of INFO and lower records; warnings always pass."""
+
+    def __init__(self, rate: float):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING or self.rate >= 1:
+            return True
+        return random.random() < self.rate
+
+
+def process_log_file(path: str) -> str:
+    """
+    `app.log` -> `app.<pid>.log`. RotatingFileHandler renames the file on
+    rollover, which is only safe with a single writer, and the production
+    server runs several worker processes.
+    """
+    stem, extension = os.path.splitext(path)
+    return f"{stem}.{os.getpid()}{extension}"
 
 
 def setup_logging():
-    logging.config.dictConfig(LOGGING_CONFIG)
+    """
+    Route all records through a queue so request handlers never block on
+    I/O; a background listener thread writes them to stdout and, when
+    LOG_FILE is set, to a rotating file owned by this process. Safe to call
+    more than once.
+    """
+    global _listener
+    if _listener is not None:
+        return
+
+    if settings.LOG_JSON:
+        formatter = JsonFormatter()
+    else:
+        formatter = logging.Formatter(DEFAULT_FORMAT)
+    handlers = [logging.StreamHandler(sys.stdout)]
+    if settings.LOG_FILE:
+        handlers.append(
+            RotatingFileHandler(
+                process_log_file(settings.LOG_FILE),
+                maxBytes=settings.LOG_FILE_MAX_BYTES,
+                backupCount=settings.LOG_FILE_BACKUP_COUNT,
+            )
+        )
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    root = logging.getLogger()
+    root.setLevel(settings.LOG_LEVEL)
+
+    log_queue = queue.SimpleQueue()
+    queue_handler = TracebackQueueHandler(log_queue)
+    queue_handler.addFilter(InfoSamplingFilter(settings.LOG_INFO_SAMPLE_RATE))
+    root.addHandler(queue_handler)
+
+    _listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    atexit.register(stop_logging)
+
+
+def stop_logging():
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
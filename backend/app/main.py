@@ -1,14 +1,34 @@
+import asyncio
 import logging
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
+from fastapi.responses import ORJSONResponse
 import os
-from app.endpoints import admin, auth, user, dashboard, super_admin, market
+from app.endpoints import (
+    admin,
+    auth,
+    user,
+    dashboard,
+    super_admin,
+    market,
+    metrics,
+    health,
+)
 from contextlib import asynccontextmanager
 
+from .config import settings
 from .logging_config import setup_logging
-from .database import Base, engine
+from .startup import startup, startup_state, warmup
+from .websocket import manager
+from .cache import gym_settings_cache, principal_cache
+from .images import (
+    UploadsStaticFiles,
+    UploadSizeLimitMiddleware,
+    shutdown_thumbnail_pool,
+)
+from .metrics import MetricsMiddleware
+from .metrics_store import metrics_store
 
 setup_logging()
 
@@ -17,13 +37,23 @@ logger = logging.getLogger(__name__)
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
-
+    await manager.start()
+    await gym_settings_cache.start()
+    await principal_cache.start()
+    await metrics_store.start()
+    await startup()
+    warmup_task = asyncio.create_task(warmup())
     yield
+    startup_state.ready = False
+    warmup_task.cancel()
+    await metrics_store.stop()
+    await shutdown_thumbnail_pool()
+    await principal_cache.stop()
+    await gym_settings_cache.stop()
+    await manager.stop()
 
 
-app = FastAPI(lifespan=lifespan)
+app = FastAPI(lifespan=lifespan, default_response_class=ORJSONResponse)
 
 # Create uploads directory if it doesn't exist
 UPLOAD_DIR = os.path.join(os.path.dirname(__file__), "uploads")
@@ -31,7 +61,7 @@ os.makedirs(UPLOAD_DIR, exist_ok=True)
 os.makedirs(os.path.join(UPLOAD_DIR, "products"), exist_ok=True)
 
 # Mount static files for serving uploaded images
-app.mount("/uploads", StaticFiles(directory=UPLOAD_DIR), name="uploads")
+app.mount("/uploads", UploadsStaticFiles(directory=UPLOAD_DIR), name="uploads")
 
 origins = [
     "http://localhost:5173",
@@ -40,12 +70,27 @@ origins = [
     "https://vayzer.uz",
 ]
 
+app.add_middleware(MetricsMiddleware)
+
+app.add_middleware(
+    UploadSizeLimitMiddleware,
+    max_bytes=settings.PRODUCT_IMAGE_MAX_BYTES + settings.UPLOAD_BODY_OVERHEAD_BYTES,
+)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=origins,
     allow_credentials=True,
     allow_methods=["GET", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"],
     allow_headers=["*"],
+    expose_headers=[
+        "X-Total-Count",
+        "X-Next-Cursor",
+        "X-RateLimit-Limit",
+        "X-RateLimit-Remaining",
+        "X-RateLimit-Reset",
+        "Retry-After",
+    ],
 )
 
 app.include_router(auth.router, prefix="/api")
@@ -54,6 +99,8 @@ app.include_router(admin.router, prefix="/api")
 app.include_router(dashboard.router, prefix="/api")
 app.include_router(super_admin.router, prefix="/api")
 app.include_router(market.router, prefix="/api")
+app.include_router(metrics.router)
+app.include_router(health.router)
 
 
 @app.get("/")
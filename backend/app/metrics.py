@@ -0,0 +1,326 @@
+import os
+import time
+import logging
+from bisect import bisect_left
+from collections import defaultdict
+from contextvars import ContextVar
+from typing import Callable
+
+from sqlalchemy import event
+
+from .config import settings
+from .database import engine, pool_stats
+
+logger = logging.getLogger("metrics")
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+# Only the first queries of a request are kept for the slow-request log
+MAX_LOGGED_QUERIES = 50
+
+
+class Histogram:
+    def __init__(self, buckets: tuple):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class RequestStats:
+    """Per-request DB and Redis counters, reachable through `current_request`."""
+
+    def __init__(self):
+        self.query_count = 0
+        self.db_seconds = 0.0
+        self.redis_calls = 0
+        self.queries: list[tuple[str, float]] = []
+
+    def record_query(self, statement: str, seconds: float):
+        self.query_count += 1
+        self.db_seconds += seconds
+        if len(self.queries) < MAX_LOGGED_QUERIES:
+            self.queries.append((statement, seconds))
+
+
+current_request: ContextVar[RequestStats | None] = ContextVar(
+    "current_request", default=None
+)
+
+
+def record_redis_call():
+    stats = current_request.get()
+    if stats is not None:
+        stats.redis_calls += 1
+
+
+@event.listens_for(engine.sync_engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+@event.listens_for(engine.sync_engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_start"].pop()
+    stats = current_request.get()
+    if stats is not None:
+        stats.record_query(statement, elapsed)
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self.requests = defaultdict(int)
+        self.duration = defaultdict(lambda: Histogram(DURATION_BUCKETS))
+        self.db_queries = defaultdict(lambda: Histogram(QUERY_COUNT_BUCKETS))
+        self.response_size = defaultdict(lambda: Histogram(SIZE_BUCKETS))
+        self.db_seconds = defaultdict(float)
+        self.redis_calls = defaultdict(int)
+
+    def observe(
+        self,
+        method: str,
+        route: str,
+        status_code: int,
+        seconds: float,
+        stats: RequestStats,
+        response_size: int,
+    ):
+        labels = (method, route)
+        self.requests[(method, route, status_code)] += 1
+        self.duration[labels].observe(seconds)
+        self.db_queries[labels].observe(stats.query_count)
+        self.response_size[labels].observe(response_size)
+        self.db_seconds[labels] += stats.db_seconds
+        self.redis_calls[labels] += stats.redis_calls
+
+
+registry = MetricsRegistry()
+
+
+# Component `stats()` callables exported as `<name>_<key>` series
+stats_sources: list[tuple[str, Callable[[], dict], tuple]] = []
+
+
+def register_stats(name: str, stats: Callable[[], dict], counters: tuple = ()):
+    """Export `stats()` as series; keys in `counters` are counters, others gauges."""
+    stats_sources.append((name, stats, counters))
+
+
+def worker_id() -> str:
+    return str(os.getpid())
+
+
+class Collector:
+    """Builds JSON-serialisable metric families labelled with this worker."""
+
+    def __init__(self):
+        self.worker = worker_id()
+        self.families: list[dict] = []
+
+    def family(self, name: str, kind: str, help_text: str) -> list:
+        samples = []
+        self.families.append(
+            {"name": name, "type": kind, "help": help_text, "samples": samples}
+        )
+        return samples
+
+    def sample(self, samples: list, name: str, value, **labels):
+        samples.append([name, {**labels, "worker": self.worker}, value])
+
+    def histogram(self, name: str, help_text: str, histograms: dict):
+        samples = self.family(name, "histogram", help_text)
+        for (method, route), histogram in histograms.items():
+            cumulative = 0
+            for bound, count in zip(histogram.buckets, histogram.counts):
+                cumulative += count
+                self.sample(
+                    samples,
+                    f"{name}_bucket",
+                    cumulative,
+                    method=method,
+                    route=route,
+                    le=str(bound),
+                )
+            self.sample(
+                samples,
+                f"{name}_bucket",
+                histogram.count,
+                method=method,
+                route=route,
+                le="+Inf",
+            )
+            self.sample(
+                samples, f"{name}_sum", histogram.sum, method=method, route=route
+            )
+            self.sample(
+                samples, f"{name}_count", histogram.count, method=method, route=route
+            )
+
+    def counter(self, name: str, help_text: str, values: dict):
+        samples = self.family(name, "counter", help_text)
+        for (method, route), value in values.items():
+            self.sample(samples, name, value, method=method, route=route)
+
+    def gauge(self, name: str, help_text: str, value):
+        self.sample(self.family(name, "gauge", help_text), name, value)
+
+
+def collect() -> list[dict]:
+    """This worker's metric families, each sample labelled with `worker`."""
+    collector = Collector()
+
+    samples = collector.family("http_requests_total", "counter", "Requests handled.")
+    for (method, route, status_code), count in registry.requests.items():
+        collector.sample(
+            samples,
+            "http_requests_total",
+            count,
+            method=method,
+            route=route,
+            status=str(status_code),
+        )
+
+    collector.histogram(
+        "http_request_duration_seconds", "Request latency.", registry.duration
+    )
+    collector.histogram(
+        "http_request_db_queries",
+        "Database queries issued per request.",
+        registry.db_queries,
+    )
+    collector.histogram(
+        "http_response_size_bytes", "Response body size.", registry.response_size
+    )
+    collector.counter(
+        "http_request_db_seconds_total",
+        "Time spent in database queries.",
+        registry.db_seconds,
+    )
+    collector.counter(
+        "http_request_redis_calls_total", "Redis round trips.", registry.redis_calls
+    )
+
+    pool = pool_stats()
+    collector.gauge("db_pool_size", "Configured pool size.", pool["size"])
+    collector.gauge("db_pool_in_use", "Connections checked out.", pool["in_use"])
+    collector.gauge(
+        "db_pool_checked_in", "Idle connections in the pool.", pool["checked_in"]
+    )
+    collector.gauge("db_pool_overflow", "Overflow connections open.", pool["overflow"])
+
+    samples = collector.family(
+        "db_pool_checkout_seconds", "summary", "Time spent waiting for a connection."
+    )
+    collector.sample(
+        samples, "db_pool_checkout_seconds_sum", pool["checkout_seconds_total"]
+    )
+    collector.sample(samples, "db_pool_checkout_seconds_count", pool["checkouts"])
+    samples = collector.family(
+        "db_pool_checkout_timeouts_total", "counter", "Checkouts that hit pool_timeout."
+    )
+    collector.sample(
+        samples, "db_pool_checkout_timeouts_total", pool["checkout_timeouts"]
+    )
+
+    for name, stats, counters in stats_sources:
+        for key, value in stats().items():
+            if key in counters:
+                metric = f"{name}_{key}_total"
+                kind = "counter"
+            else:
+                metric = f"{name}_{key}"
+                kind = "gauge"
+            collector.sample(
+                collector.family(metric, kind, f"{name} {key}."), metric, value
+            )
+
+    return collector.families
+
+
+def _labels(labels: dict) -> str:
+    return "{" + ",".join(f'{key}="{value}"' for key, value in labels.items()) + "}"
+
+
+def render(families: list[dict]) -> str:
+    """
+    Prometheus text exposition of families from one or more workers; samples
+    of the same family are grouped under a single HELP/TYPE header.
+    """
+    merged: dict[str, dict] = {}
+    for family in families:
+        target = merged.setdefault(family["name"], {**family, "samples": []})
+        target["samples"].extend(family["samples"])
+
+    lines = []
+    for name, family in merged.items():
+        lines.append(f"# HELP {name} {family['help']}")
+        lines.append(f"# TYPE {name} {family['type']}")
+        for sample_name, labels, value in family["samples"]:
+            lines.append(f"{sample_name}{_labels(labels)} {value}")
+    return "\n".join(lines) + "\n"
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording latency, DB/Redis usage and response size per
+    route template, and logging requests over the slow thresholds together
+    with the queries they ran.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = current_request.set(stats)
+        status_code = 500
+        response_size = 0
+
+        async def send_wrapper(message):
+            nonlocal status_code, response_size
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            elif message["type"] == "http.response.body":
+                response_size += len(message.get("body", b""))
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            current_request.reset(token)
+
+            route = getattr(scope.get("route"), "path", None) or "unmatched"
+            registry.observe(
+                scope["method"], route, status_code, elapsed, stats, response_size
+            )
+
+            if (
+                elapsed * 1000 >= settings.SLOW_REQUEST_MS
+                or stats.query_count >= settings.SLOW_REQUEST_QUERIES
+            ):
+                logger.warning(
+                    "Slow request %s %s: %.1f ms, %d queries (%.1f ms), %d redis calls\n%s",
+                    scope["method"],
+                    route,
+                    elapsed * 1000,
+                    stats.query_count,
+                    stats.db_seconds * 1000,
+                    stats.redis_calls,
+                    "\n".join(
+                        f"  {seconds * 1000:.1f} ms  {' '.join(statement.split())}"
+                        for statement, seconds in stats.queries
+                    ),
+                )
@@ -0,0 +1,81 @@
+"""
+Cross-worker view of the per-process metrics.
+
+Every worker keeps its own counters in memory (see `metrics.py`). Under
+gunicorn a scrape lands on an arbitrary worker, so serving only that
+worker's counters would make them jump between processes. Instead each
+worker publishes its samples to Redis every METRICS_PUSH_INTERVAL seconds,
+and `/metrics` renders the union, every series labelled with `worker`. Each
+series is then monotonic; aggregate with `sum without (worker)`. A recycled
+worker's key expires after a few intervals, which Prometheus treats as the
+series ending.
+"""
+
+import json
+import socket
+import asyncio
+import logging
+
+from redis.exceptions import RedisError
+
+from .config import settings
+from .metrics import collect, worker_id
+from .rate_limiter import redis
+
+logger = logging.getLogger("metrics")
+
+KEY_PREFIX = f"metrics:{socket.gethostname()}:"
+
+
+class WorkerMetricsStore:
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._task: asyncio.Task | None = None
+
+    async def publish(self):
+        await redis.set(
+            f"{KEY_PREFIX}{worker_id()}",
+            json.dumps(collect()),
+            ex=max(1, int(self.interval * 3)),
+        )
+
+    async def collect_all(self) -> list[dict]:
+        families = collect()
+        own_key = f"{KEY_PREFIX}{worker_id()}"
+        try:
+            keys = [
+                key async for key in redis.scan_iter(f"{KEY_PREFIX}*") if key != own_key
+            ]
+            snapshots = await redis.mget(keys) if keys else []
+        except RedisError:
+            logger.warning("Redis unavailable, serving this worker's metrics only")
+            return families
+
+        for snapshot in snapshots:
+            if snapshot:
+                families.extend(json.loads(snapshot))
+        return families
+
+    async def _run(self):
+        while True:
+            try:
+                await self.publish()
+            except RedisError:
+                logger.warning("Redis unavailable, worker metrics not published")
+            await asyncio.sleep(self.interval)
+
+    async def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+metrics_store = WorkerMetricsStore(interval=settings.METRICS_PUSH_INTERVAL)
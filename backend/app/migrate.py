@@ -0,0 +1,96 @@
+"""
+Bring the database schema to the Alembic head, once, before workers start.
+
+    python -m app.migrate
+
+Run by entrypoint.sh on every start, so N gunicorn workers never race each
+other on DDL, and databases whose workers also run create_all
+(SCHEMA_CREATE_ALL, dev) still get new columns and constraints on existing
+tables. The migration history predates the gyms and market tables, so two
+bootstrap cases are handled first:
+
+* an empty database is created from the models and stamped at head;
+* a database created by `create_all` without Alembic is stamped at the last
+  revision that matches those models, then upgraded. create_all may already
+  have made some later tables and indexes, so the revisions after the
+  baseline skip objects that exist.
+
+Dashboards read only the gym_daily_stats rollup, so while it is empty (the
+first run after 8e42b0c6d1f3 creates it) it is backfilled from the raw
+tables.
+"""
+
+import asyncio
+import logging
+
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import create_engine, inspect, select
+from sqlalchemy.engine import URL
+
+from .backfill import backfill_daily_stats
+from .config import settings
+from .database import Base
+from .models import GymDailyStats
+from .logging_config import setup_logging
+from .startup import ALEMBIC_INI
+
+logger = logging.getLogger("migrate")
+
+# Schema produced by create_all before the Alembic-managed indexes and
+# rollup tables were introduced
+CREATE_ALL_BASELINE = "f6f884f5a4fe"
+
+
+def sync_url() -> URL:
+    return URL.create(
+        "postgresql+psycopg2",
+        username=settings.POSTGRES_USER,
+        password=settings.POSTGRES_PASSWORD,
+        host=settings.POSTGRES_HOST,
+        port=settings.POSTGRES_PORT,
+        database=settings.POSTGRES_DB,
+    )
+
+
+def migrate():
+    config = Config(ALEMBIC_INI)
+    url = sync_url()
+    config.set_main_option(
+        "sqlalchemy.url", url.render_as_string(hide_password=False).replace("%", "%%")
+    )
+
+    engine = create_engine(url)
+    try:
+        tables = set(inspect(engine).get_table_names())
+        if not tables:
+            logger.info("Empty database, creating schema from models")
+            Base.metadata.create_all(engine)
+            command.stamp(config, "head")
+            return
+        if "alembic_version" not in tables:
+            logger.info("Unversioned database, stamping %s", CREATE_ALL_BASELINE)
+            command.stamp(config, CREATE_ALL_BASELINE)
+    finally:
+        engine.dispose()
+
+    command.upgrade(config, "head")
+
+    if rollup_is_empty(url):
+        logger.info("gym_daily_stats is empty, backfilling from raw tables")
+        asyncio.run(backfill_daily_stats())
+
+
+def rollup_is_empty(url: URL) -> bool:
+    engine = create_engine(url)
+    try:
+        with engine.connect() as conn:
+            row = conn.execute(select(GymDailyStats.gym_id).limit(1)).first()
+        return row is None
+    finally:
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    setup_logging()
+    migrate()
@@ -1,6 +1,7 @@
 import uuid
 
-from sqlalchemy import Column, String, Boolean, Date, ForeignKey, Integer
+from sqlalchemy import Column, String, Boolean, Date, ForeignKey, Integer, Index
+from sqlalchemy import DDL, UniqueConstraint, event
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from datetime import datetime, date
@@ -22,6 +23,27 @@ class Gyms(Base):
 
 class Users(Base):
     __tablename__ = "users"
+    __table_args__ = (
+        Index("ix_users_gym_id_role", "gym_id", "role"),
+        Index(
+            "ix_users_first_name_trgm",
+            "first_name",
+            postgresql_using="gin",
+            postgresql_ops={"first_name": "gin_trgm_ops"},
+        ),
+        Index(
+            "ix_users_last_name_trgm",
+            "last_name",
+            postgresql_using="gin",
+            postgresql_ops={"last_name": "gin_trgm_ops"},
+        ),
+        Index(
+            "ix_users_phone_number_trgm",
+            "phone_number",
+            postgresql_using="gin",
+            postgresql_ops={"phone_number": "gin_trgm_ops"},
+        ),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     first_name = Column(String(50), nullable=False)
@@ -58,6 +80,12 @@ class Users(Base):
         return f"{self.first_name} {self.last_name}"
 
 
+# The trigram indexes on users need pg_trgm when tables are created by create_all
+event.listen(
+    Users.__table__, "before_create", DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+)
+
+
 class SubscriptionPlans(Base):
     __tablename__ = "subscription_plan"
 
@@ -81,6 +109,10 @@ class SubscriptionPlans(Base):
 
 class Subscriptions(Base):
     __tablename__ = "subscription"
+    __table_args__ = (
+        Index("ix_subscription_gym_id_active_end", "gym_id", "is_active", "end_date"),
+        Index("ix_subscription_user_id_active_end", "user_id", "is_active", "end_date"),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
 
@@ -112,10 +144,16 @@ class Subscriptions(Base):
 
 class Attendance(Base):
     __tablename__ = "attendance"
+    __table_args__ = (
+        Index("ix_attendance_gym_id_date", "gym_id", "date"),
+        UniqueConstraint(
+            "user_id", "gym_id", "date", name="uq_attendance_user_gym_date"
+        ),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
 
-    date = Column(Date, default=date.today(), nullable=False)
+    date = Column(Date, default=date.today, nullable=False)
 
     gym_id = Column(
         UUID(as_uuid=True), ForeignKey("gyms.id", ondelete="CASCADE"), nullable=True
@@ -128,10 +166,13 @@ class Attendance(Base):
 
 class Payment(Base):
     __tablename__ = "payments"
+    __table_args__ = (
+        Index("ix_payments_gym_id_payment_date", "gym_id", "payment_date"),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     amount = Column(Integer, nullable=False)
-    payment_date = Column(Date, default=date.today(), nullable=False)
+    payment_date = Column(Date, default=date.today, nullable=False)
     payment_method = Column(String(50), nullable=False)
 
     gym_id = Column(
@@ -148,10 +189,13 @@ class Payment(Base):
 
 class DailySubscriptions(Base):
     __tablename__ = "daily_subscriptions"
+    __table_args__ = (
+        Index("ix_daily_subscriptions_gym_id_date", "gym_id", "subscription_date"),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
 
-    subscription_date = Column(Date, default=date.today(), nullable=False)
+    subscription_date = Column(Date, default=date.today, nullable=False)
     amount = Column(Integer, nullable=False)
 
     gym_id = Column(
@@ -167,17 +211,20 @@ class DailySubscriptions(Base):
 
 class Products(Base):
     __tablename__ = "products"
+    __table_args__ = (Index("ix_products_gym_id_created_at", "gym_id", "created_at"),)
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     name = Column(String(100), nullable=False)
     image_path = Column(String(255), nullable=True)
+    # Set once the background thumbnail for image_path has been written
+    thumbnail_path = Column(String(255), nullable=True)
     selling_price = Column(Integer, nullable=False)
     purchase_price = Column(Integer, nullable=False)
     total_amount = Column(Integer, nullable=False)
     current_amount = Column(Integer, nullable=False)
     supplier_name = Column(String(100), nullable=True)
 
-    created_at = Column(Date, default=date.today(), nullable=False)
+    created_at = Column(Date, default=date.today, nullable=False)
 
     gym_id = Column(
         UUID(as_uuid=True), ForeignKey("gyms.id", ondelete="CASCADE"), nullable=True
@@ -195,11 +242,11 @@ class ProductSales(Base):
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     quantity = Column(Integer, nullable=False)
     total_price = Column(Integer, nullable=False)
-    sale_date = Column(Date, default=date.today(), nullable=False)
+    sale_date = Column(Date, default=date.today, nullable=False)
     payment_method = Column(String(50), nullable=False)
 
     gym_id = Column(
-UUID(as_uuid=True), ForeignKey("gyms.id", ondelete="CASCADE"), nullable=True
+        UUID(as_uuid=True), ForeignKey("gyms.id", ondelete="CASCADE"), nullable=True
     )
     gym = relationship("Gyms")
 
@@ -209,3 +256,22 @@ UUID(as_uuid=True), ForeignKey("gyms.id", ondelete="CASCADE"), nullable=True
         nullable=False,
     )
     product = relationship("Products", back_populates="sales")
+
+
+class GymDailyStats(Base):
+    __tablename__ = "gym_daily_stats"
+
+    gym_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("gyms.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    day = Column(Date, primary_key=True)
+
+    card_revenue = Column(Integer, nullable=False, default=0, server_default="0")
+    cash_revenue = Column(Integer, nullable=False, default=0, server_default="0")
+    market_revenue = Column(Integer, nullable=False, default=0, server_default="0")
+
+    daily_visits = Column(Integer, nullable=False, default=0, server_default="0")
+    attendance_count = Column(Integer, nullable=False, default=0, server_default="0")
+    new_subscriptions = Column(Integer, nullable=False, default=0, server_default="0")
@@ -1,34 +1,198 @@
-from redis.asyncio import Redis
-from fastapi import Request, HTTPException, status
+import json
+import math
+import time
+import asyncio
+import logging
+from collections import OrderedDict
+
+from redis.asyncio import BlockingConnectionPool, Redis
+from redis.asyncio.client import Pipeline
+from redis.exceptions import RedisError
+from fastapi import Request, Response, HTTPException, status
 from .config import settings
+from .metrics import record_redis_call
+
+
+class InstrumentedPipeline(Pipeline):
+    async def execute(self, raise_on_error: bool = True):
+        record_redis_call()
+        return await super().execute(raise_on_error)
+
+
+class InstrumentedRedis(Redis):
+    """Redis client that counts round trips against the current request."""
+
+    async def execute_command(self, *args, **options):
+        record_redis_call()
+        return await super().execute_command(*args, **options)
+
+    def pipeline(self, transaction: bool = True, shard_hint: str | None = None):
+        return InstrumentedPipeline(
+            self.connection_pool, self.response_callbacks, transaction, shard_hint
+        )
+
 
-redis = Redis(
-    host=settings.REDIS_HOST,
-    port=settings.REDIS_PORT,
-    decode_responses=True,
+redis = InstrumentedRedis(
+    connection_pool=BlockingConnectionPool(
+        host=settings.REDIS_HOST,
+        port=settings.REDIS_PORT,
+        decode_responses=True,
+        max_connections=settings.REDIS_MAX_CONNECTIONS,
+    )
 )
 
+logger = logging.getLogger("rate_limiter")
+
+# Token bucket: refills `rate` tokens per millisecond up to `capacity`.
+# Uses the Redis clock so every worker agrees on elapsed time.
+# Returns {allowed, remaining, retry_after_ms, reset_ms}.
+TOKEN_BUCKET_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local clock = redis.call('TIME')
+local now = clock[1] * 1000 + math.floor(clock[2] / 1000)
+
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(bucket[1]) or capacity
+local ts = tonumber(bucket[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+
+local allowed = 0
+local retry_after = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+    allowed = 1
+else
+    retry_after = math.ceil((1 - tokens) / rate)
+end
+
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', now)
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / rate))
+local reset = math.ceil((capacity - tokens) / rate)
+return {allowed, math.floor(tokens), retry_after, reset}
+"""
+
+token_bucket = redis.register_script(TOKEN_BUCKET_SCRIPT)
+
+
+class LocalTokenBucket:
+    """
+    Per-process token buckets used when Redis is slow or unavailable.
+
+    Limits are enforced per worker rather than globally, so this is a
+    degraded mode, not a replacement.
+    """
+
+    def __init__(self, maxsize: int = 10000):
+        self.maxsize = maxsize
+        self._buckets: OrderedDict = OrderedDict()
+
+    def take(self, key: str, capacity: int, rate: float) -> list:
+        now = time.monotonic() * 1000
+        tokens, ts = self._buckets.get(key, (capacity, now))
+        tokens = min(capacity, tokens + (now - ts) * rate)
+
+        allowed = 0
+        retry_after = 0
+        if tokens >= 1:
+            tokens -= 1
+            allowed = 1
+        else:
+            retry_after = math.ceil((1 - tokens) / rate)
+
+        self._buckets[key] = (tokens, now)
+        self._buckets.move_to_end(key)
+        while len(self._buckets) > self.maxsize:
+            self._buckets.popitem(last=False)
+
+        return [
+            allowed,
+            math.floor(tokens),
+            retry_after,
+            math.ceil((capacity - tokens) / rate),
+        ]
+
+
+local_buckets = LocalTokenBucket()
+
+# Set while Redis is failing so the fallback is logged once per outage rather
+# than on every request
+redis_degraded = False
+
 
 class RateLimiter:
-    def __init__(self, request_limit: int, timeout: int):
+    """
+    Token bucket allowing `request_limit` requests per `timeout` seconds.
+
+    Buckets are keyed by route and principal: the `key_field` value from the
+    JSON body when given (e.g. the phone number on login), otherwise the
+    client IP. Limiters keyed on different fields can be stacked on one
+    route without sharing buckets. Each check is a single EVALSHA round trip.
+    """
+
+    def __init__(self, request_limit: int, timeout: int, key_field: str | None = None):
         self.request_limit = request_limit
         self.timeout = timeout
+        self.key_field = key_field
+        self.rate = request_limit / (timeout * 1000)
+
+    async def principal(self, request: Request) -> str:
+        if self.key_field:
+            try:
+                body = await request.json()
+            except (json.JSONDecodeError, UnicodeDecodeError):
+                body = None
+            if isinstance(body, dict) and body.get(self.key_field):
+                return str(body[self.key_field]).strip()
+        return request.client.host
 
-    async def __call__(self, request: Request):
-        client_ip = request.client.host
+    async def take(self, key: str) -> list:
+        global redis_degraded
+        try:
+            result = await asyncio.wait_for(
+                token_bucket(keys=[key], args=[self.request_limit, self.rate]),
+                settings.RATE_LIMIT_REDIS_TIMEOUT,
+            )
+        except (RedisError, asyncio.TimeoutError):
+            if not redis_degraded:
+                redis_degraded = True
+                logger.warning(
+                    "Redis rate limiter unavailable, using in-process buckets"
+                )
+            return local_buckets.take(key, self.request_limit, self.rate)
+
+        if redis_degraded:
+            redis_degraded = False
+            logger.info("Redis rate limiter recovered")
+        return result
 
-        pipeline = redis.pipeline()
-        pipeline.incr(client_ip)
-        pipeline.expire(client_ip, self.timeout)
-        result = await pipeline.execute()
+    async def __call__(self, request: Request, response: Response):
+        route = request.scope.get("route")
+        route_path = route.path if route else request.url.path
+        scope = self.key_field or "ip"
+        key = f"ratelimit:{route_path}:{scope}:{await self.principal(request)}"
 
-        number_of_requests = result[0]
+        allowed, remaining, retry_after, reset = await self.take(key)
 
-        if number_of_requests > self.request_limit:
+        headers = {
+            "X-RateLimit-Limit": str(self.request_limit),
+            "X-RateLimit-Remaining": str(remaining),
+            "X-RateLimit-Reset": str(math.ceil(reset / 1000)),
+        }
+
+        if not allowed:
+            headers["Retry-After"] = str(math.ceil(retry_after / 1000))
             raise HTTPException(
                 status_code=status.HTTP_429_TOO_MANY_REQUESTS,
                 detail="Too many requests. Try again later.",
+                headers=headers,
             )
 
+        response.headers.update(headers)
+
 
 rate_limiter = RateLimiter(5, 60)
+login_rate_limiter = RateLimiter(5, 60, key_field="phone_number")
+# Caps one client cycling through phone numbers; looser than the per-phone
+# limit since a gym's front desk often shares one NAT address
+login_ip_rate_limiter = RateLimiter(20, 60)
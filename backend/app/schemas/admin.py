@@ -1,7 +1,9 @@
 from uuid import UUID
-from pydantic import BaseModel, field_serializer
+from pydantic import BaseModel, Field, field_serializer, field_validator
 from enum import Enum
-from datetime import date
+from datetime import date, datetime, timedelta
+
+from ..config import settings
 
 
 class PaymentMethod(str, Enum):
@@ -9,6 +11,12 @@ class PaymentMethod(str, Enum):
     CASH = "cash"
 
 
+class ExportFormat(str, Enum):
+    XLSX = "xlsx"
+    CSV = "csv"
+    NDJSON = "ndjson"
+
+
 class SubscriptionPlanCreate(BaseModel):
     name: str
     price: int
@@ -65,9 +73,48 @@ class PaymentResponse(BaseModel):
     payment_date: date
 
 
+class EndedSubscriptionResponse(BaseModel):
+    user_id: UUID
+    first_name: str
+    last_name: str
+    phone_number: str
+    days_left: int
+    status: str
+
+
 class AttendanceResponse(BaseModel):
     user: UserResponse
     date: date
 
 
+class ScanStatus(str, Enum):
+    CHECKED_IN = "checked_in"
+    DUPLICATE = "duplicate"
+    NOT_ENTITLED = "not_entitled"
+
 
+class AttendanceScan(BaseModel):
+    user_id: UUID
+    timestamp: datetime
+
+    @field_validator("timestamp")
+    def validate_timestamp(cls, timestamp: datetime) -> datetime:
+        # Naive timestamps are local time, like the server's own clock
+        now = datetime.now(timestamp.tzinfo)
+        if timestamp > now + timedelta(seconds=settings.SCAN_CLOCK_SKEW_SECONDS):
+            raise ValueError("Scan timestamp cannot be in the future")
+        return timestamp
+
+
+class AttendanceBatchCreate(BaseModel):
+    scans: list[AttendanceScan] = Field(..., max_length=20000)
+
+
+class AttendanceScanResult(BaseModel):
+    user_id: UUID
+    timestamp: datetime
+    status: ScanStatus
+
+    @field_serializer("user_id")
+    def serialize_id(self, id: UUID) -> str:
+        return str(id)
@@ -1,5 +1,5 @@
 from uuid import UUID
-from pydantic import BaseModel, field_serializer
+from pydantic import BaseModel, Field, field_serializer
 from datetime import date
 from enum import Enum
 
@@ -36,6 +36,7 @@ class ProductResponse(BaseModel):
     id: UUID
     name: str
     image_path: str | None = None
+    thumbnail_path: str | None = None
     selling_price: int
     purchase_price: int
     total_amount: int
@@ -53,13 +54,42 @@ class ProductResponse(BaseModel):
 
 class ProductSellRequest(BaseModel):
     product_id: str
-    quantity: int
+    quantity: int = Field(..., gt=0)
     payment_method: PaymentMethod
 
     class Config:
         from_attributes = True
 
 
+class BasketItem(BaseModel):
+    product_id: UUID
+    quantity: int = Field(..., gt=0)
+
+
+class BasketCheckoutRequest(BaseModel):
+    items: list[BasketItem] = Field(..., min_length=1, max_length=100)
+    payment_method: PaymentMethod
+
+
+class BasketLineResult(BaseModel):
+    sale_id: UUID
+    product_id: UUID
+    product_name: str
+    quantity: int
+    total_price: int
+    remaining_amount: int
+
+    @field_serializer("sale_id", "product_id")
+    def serialize_id(self, id: UUID) -> str:
+        return str(id)
+
+
+class BasketCheckoutResponse(BaseModel):
+    message: str
+    total_price: int
+    lines: list[BasketLineResult]
+
+
 class ProductSaleResponse(BaseModel):
     id: UUID
     quantity: int
@@ -1,5 +1,6 @@
 from pydantic import (
     BaseModel,
+    computed_field,
     field_serializer,
     field_validator,
     model_validator,
@@ -134,6 +135,56 @@ class UserResponse(BaseModel):
     subscriptions: list[SubscriptionResponse] = []
 
 
+class UserPaymentResponse(BaseModel):
+    amount: int
+    payment_date: date
+    payment_method: str
+
+    class Config:
+        from_attributes = True
+
+
+class UserSubscriptionResponse(BaseModel):
+    start_date: date | None = None
+    end_date: date | None = None
+    plan: SubscriptionPlansResponse | None = None
+
+    @computed_field
+    @property
+    def days_left(self) -> int:
+        return (self.end_date - date.today()).days if self.end_date else 0
+
+    class Config:
+        from_attributes = True
+
+
+class UserAttendanceResponse(BaseModel):
+    date: date
+
+    class Config:
+        from_attributes = True
+
+
+class UserDetailResponse(BaseModel):
+    first_name: str
+    last_name: str
+    phone_number: str
+    date_of_birth: date | None = None
+    gender: str | None = None
+    is_active: bool | None = True
+    payments: list[UserPaymentResponse] = []
+    subscriptions: list[UserSubscriptionResponse] = []
+    attendances: list[UserAttendanceResponse] = []
+
+    class Config:
+        from_attributes = True
+
+
+class CurrentUserResponse(UserDetailResponse):
+    id: UUID
+    role: str | None = None
+
+
 class UserListResponse(BaseModel):
     id: UUID
     first_name: str
@@ -1,18 +1,58 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from passlib.context import CryptContext
 from jose import jwt
 from datetime import datetime, timedelta
 from .config import settings
-
+from .metrics import register_stats
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 
+class PasswordHasher:
+    """
+    Runs bcrypt on a bounded thread pool so it never blocks the event loop.
+
+    bcrypt releases the GIL while hashing, so threads give real parallelism
+    up to `max_workers`; extra calls wait in the executor queue.
+    """
+
+    def __init__(self, max_workers: int):
+        self.max_workers = max_workers
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="bcrypt"
+        )
+        self.in_flight = 0
+        self.completed = 0
+
+    async def run(self, func, *args):
+        loop = asyncio.get_running_loop()
+        self.in_flight += 1
+        try:
+            return await loop.run_in_executor(self.executor, func, *args)
+        finally:
+            self.in_flight -= 1
+            self.completed += 1
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.max_workers,
+            "in_flight": self.in_flight,
+            "queue_depth": max(0, self.in_flight - self.max_workers),
+            "completed": self.completed,
+        }
+
+
+password_hasher = PasswordHasher(max_workers=settings.PASSWORD_HASH_WORKERS)
+register_stats("password_hasher", password_hasher.stats, counters=("completed",))
+
+
 async def hash_password(user_pwd: str) -> str:
-    return pwd_context.hash(user_pwd)
+    return await password_hasher.run(pwd_context.hash, user_pwd)
 
 
 async def verify_password(user_pwd: str, hashed_pwd: str) -> bool:
-    return pwd_context.verify(user_pwd, hashed_pwd)
+    return await password_hasher.run(pwd_context.verify, user_pwd, hashed_pwd)
 
 
 async def create_access_token(data: dict) -> str:
@@ -0,0 +1,86 @@
+"""
+Production launcher: gunicorn managing uvicorn workers.
+
+    python -m app.server
+
+The worker count defaults to the CPU count (WEB_CONCURRENCY overrides it).
+DB_CONNECTION_BUDGET and REDIS_CONNECTION_BUDGET are split across the
+workers so N processes never open more connections than Postgres and Redis
+were sized for.
+"""
+
+import os
+
+from gunicorn.app.base import BaseApplication
+from gunicorn.util import import_app
+from uvicorn.workers import UvicornWorker
+
+from .config import settings
+
+
+class ProductionWorker(UvicornWorker):
+    CONFIG_KWARGS = {"loop": "uvloop", "http": "httptools"}
+
+
+def worker_count() -> int:
+    return settings.WEB_CONCURRENCY or os.cpu_count() or 1
+
+
+# Redis pub/sub connections each worker holds for its whole life, taken from
+# the same pool: websocket fan-out, gym settings and principal invalidation
+REDIS_PUBSUB_LISTENERS = 3
+
+
+def pool_settings(workers: int) -> dict:
+    """Per-worker connection limits derived from the shared budgets."""
+    db_per_worker = max(2, settings.DB_CONNECTION_BUDGET // workers)
+
+    # Reserve the pinned listeners first so they can never starve commands
+    redis_commands = settings.REDIS_CONNECTION_BUDGET - REDIS_PUBSUB_LISTENERS * workers
+    redis_per_worker = max(1, redis_commands // workers)
+
+    return {
+        "DB_POOL_SIZE": max(1, db_per_worker // 2),
+        "DB_MAX_OVERFLOW": db_per_worker - max(1, db_per_worker // 2),
+        "REDIS_MAX_CONNECTIONS": REDIS_PUBSUB_LISTENERS + redis_per_worker,
+    }
+
+
+class Server(BaseApplication):
+    def __init__(self, app_uri: str, options: dict):
+        self.app_uri = app_uri
+        self.options = options
+        super().__init__()
+
+    def load_config(self):
+        for key, value in self.options.items():
+            self.cfg.set(key, value)
+
+    def load(self):
+        return import_app(self.app_uri)
+
+
+def run(workers: int | None = None, port: int | None = None):
+    workers = workers or worker_count()
+
+    # Workers are forked from this process and import the app afterwards,
+    # so the engine and Redis pool pick up these values
+    for key, value in pool_settings(workers).items():
+        setattr(settings, key, value)
+
+    options = {
+        "bind": f"{settings.SERVER_HOST}:{port or settings.SERVER_PORT}",
+        "workers": workers,
+        "worker_class": "app.server.ProductionWorker",
+        "max_requests": settings.MAX_REQUESTS,
+        "max_requests_jitter": settings.MAX_REQUESTS_JITTER,
+        "graceful_timeout": settings.GRACEFUL_TIMEOUT,
+        "timeout": settings.WORKER_TIMEOUT,
+        "keepalive": settings.KEEPALIVE,
+        "accesslog": None,
+    }
+    Server("app.main:app", options).run()
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,117 @@
+"""
+Worker boot sequence.
+
+With SCHEMA_CREATE_ALL disabled the schema is owned by Alembic: each worker
+checks the database revision against the migration head once instead of
+reflecting every table. That check runs before the worker accepts
+requests; warming the connection pool and preloading the in-process caches
+runs in the background afterwards, and /health/ready reports "starting"
+until it has finished. Cold-start time of both modes is compared by
+benchmarks/startup.py.
+"""
+
+import os
+import time
+import asyncio
+import logging
+
+from alembic.config import Config
+from alembic.script import ScriptDirectory
+from sqlalchemy import text
+from sqlalchemy.exc import ProgrammingError
+
+from .config import settings
+from .database import Base, async_session, engine
+from .cache import gym_settings_cache
+
+logger = logging.getLogger("startup")
+
+ALEMBIC_INI = os.path.join(os.path.dirname(os.path.dirname(__file__)), "alembic.ini")
+
+
+class StartupState:
+    def __init__(self):
+        self.ready = False
+        self.timings: dict[str, float] = {}
+
+
+startup_state = StartupState()
+
+
+def alembic_heads() -> set[str]:
+    return set(ScriptDirectory.from_config(Config(ALEMBIC_INI)).get_heads())
+
+
+async def check_schema_revision():
+    async with engine.connect() as conn:
+        try:
+            result = await conn.execute(text("SELECT version_num FROM alembic_version"))
+            current = {row[0] for row in result}
+        except ProgrammingError:
+            current = set()
+
+    heads = alembic_heads()
+    if current != heads:
+        raise RuntimeError(
+            f"Database revision {sorted(current) or None} does not match migration "
+            f"head {sorted(heads)}; run `alembic upgrade head` before starting"
+        )
+
+
+async def create_schema():
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+
+async def warm_pool():
+    """Open `DB_POOL_SIZE` connections up front so first requests skip the connect."""
+
+    async def ping():
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+
+    await asyncio.gather(*(ping() for _ in range(settings.DB_POOL_SIZE)))
+
+
+async def preload_caches():
+    async with async_session() as db:
+        await gym_settings_cache.preload(db)
+
+
+async def timed_step(name: str, step):
+    start = time.perf_counter()
+    await step()
+    startup_state.timings[name] = time.perf_counter() - start
+
+
+async def startup(create_all: bool | None = None):
+    """Schema step; must succeed before the worker serves requests."""
+    if create_all is None:
+        create_all = settings.SCHEMA_CREATE_ALL
+
+    if create_all:
+        await timed_step("create_all", create_schema)
+    else:
+        await timed_step("schema_check", check_schema_revision)
+
+
+async def warmup():
+    """
+    Background half of the boot sequence. A failed warmup only costs the
+    first requests a cold pool and cache, so the worker is marked ready
+    either way.
+    """
+    try:
+        await timed_step("warm_pool", warm_pool)
+        await timed_step("preload_caches", preload_caches)
+    except Exception:
+        logger.exception("Warmup failed, serving with a cold pool and caches")
+
+    startup_state.ready = True
+    logger.info(
+        "Startup finished: %s",
+        ", ".join(
+            f"{name}={seconds * 1000:.1f}ms"
+            for name, seconds in startup_state.timings.items()
+        ),
+    )
@@ -0,0 +1,104 @@
+from datetime import date
+
+from sqlalchemy import select, and_, func
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .models import (
+    Users,
+    Subscriptions,
+    SubscriptionPlans,
+    GymDailyStats,
+)
+
+REVENUE_COLUMNS = {"card": "card_revenue", "cash": "cash_revenue"}
+
+
+def revenue_column(payment_method: str) -> str:
+    return REVENUE_COLUMNS[payment_method]
+
+
+async def increment_daily_stats(gym_id: str, db: AsyncSession, **increments: int):
+    """
+    Add `increments` to today's gym_daily_stats row, creating it if needed.
+
+    Runs inside the caller's transaction so the rollup commits (or rolls
+    back) together with the rows it summarises.
+    """
+    stmt = insert(GymDailyStats).values(gym_id=gym_id, day=date.today(), **increments)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[GymDailyStats.gym_id, GymDailyStats.day],
+        set_={
+            name: getattr(GymDailyStats, name) + stmt.excluded[name]
+            for name in increments
+        },
+    )
+    await db.execute(stmt)
+
+
+async def fetch_user_stats(gym_id: str, db: AsyncSession) -> dict:
+    """Client, trainer and today's attendance counts in a single round trip."""
+    user_counts = (
+        select(
+            func.count(Users.id)
+            .filter(and_(Users.role == "client", Users.is_superuser == False))
+            .label("total_active_users"),
+            func.count(Users.id)
+            .filter(Users.role == "trainer")
+            .label("total_trainers"),
+        )
+        .where(Users.gym_id == gym_id)
+        .cte("user_counts")
+    )
+
+    today_attendance = (
+        select(func.coalesce(func.sum(GymDailyStats.attendance_count), 0))
+        .where(GymDailyStats.day == date.today(), GymDailyStats.gym_id == gym_id)
+        .scalar_subquery()
+    )
+
+    result = await db.execute(
+        select(
+            user_counts.c.total_active_users,
+            user_counts.c.total_trainers,
+            today_attendance.label("today_attendance"),
+        )
+    )
+    row = result.mappings().one()
+
+    return {
+        "total_active_users": row["total_active_users"],
+        "total_trainers": row["total_trainers"],
+        "today_attendance": row["today_attendance"],
+    }
+
+
+async def fetch_subscription_stats(gym_id: str, db: AsyncSession) -> dict:
+    """
+    Active subscription counts per plan type plus the overall total.
+
+    The total is computed with a window sum over the grouped counts so both
+    come back from the same statement.
+    """
+    result = await db.execute(
+        select(
+            SubscriptionPlans.type,
+            func.count(Subscriptions.id).label("count"),
+            func.sum(func.count(Subscriptions.id)).over().label("total"),
+        )
+        .join(SubscriptionPlans, Subscriptions.plan_id == SubscriptionPlans.id)
+        .where(
+            Subscriptions.is_active == True,
+            Subscriptions.gym_id == gym_id,
+            Subscriptions.end_date >= date.today(),
+        )
+        .group_by(SubscriptionPlans.type)
+    )
+    rows = result.all()
+
+    total = int(rows[0].total) if rows else 0
+
+    return {
+        "by_type": [(row.type, row.count) for row in rows],
+        "total_active_subscriptions": total,
+    }
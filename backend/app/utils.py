@@ -1,45 +1,273 @@
+import uuid
+import logging
+from collections import Counter
+
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_, func
+from sqlalchemy import select, and_, or_, func, exists, literal, values, column, Date
+from sqlalchemy.dialects.postgresql import UUID, insert as pg_insert
 from fastapi import HTTPException, status
-from datetime import date, datetime, timedelta
+from datetime import date, datetime, time, timedelta
+from redis.exceptions import RedisError
 
-from .models import Subscriptions, Payment, Gyms, Users, DailySubscriptions
+from .config import settings
+from .rate_limiter import redis
+from .cache import gym_settings_cache
+from .models import (
+    Attendance,
+    Subscriptions,
+    Users,
+    DailySubscriptions,
+    GymDailyStats,
+)
 
+logger = logging.getLogger("utils")
 
-async def get_active_subscription(user_id: str, db: AsyncSession) -> bool:
-    result = await db.execute(
-        select(Subscriptions).where(
+
+def entitlement_cache_key(user_id) -> str:
+    return f"entitled:{user_id}"
+
+
+async def set_entitlement(
+    user_id, entitled_until: date | None, only_if_missing: bool = False
+):
+    """
+    Cache the last day `user_id` may train. The key expires at the midnight
+    after that day, or tonight when the user has no entitlement.
+
+    Read-through fills pass `only_if_missing` so they never overwrite a
+    value written concurrently by the subscription assign path.
+    """
+    last_day = entitled_until or date.today()
+    expires_at = datetime.combine(last_day + timedelta(days=1), time.min)
+
+    try:
+        await redis.set(
+            entitlement_cache_key(user_id),
+            entitled_until.isoformat() if entitled_until else "",
+            exat=int(expires_at.timestamp()),
+            nx=only_if_missing,
+        )
+    except RedisError:
+        logger.warning("Redis unavailable, entitlement not cached: user_id=%s", user_id)
+
+
+async def clear_entitlements(user_ids):
+    """Drop cached entitlements, e.g. after their subscriptions were deleted."""
+    keys = [entitlement_cache_key(user_id) for user_id in user_ids]
+    if not keys:
+        return
+    try:
+        await redis.delete(*keys)
+    except RedisError:
+        logger.warning("Redis unavailable, could not clear %d entitlements", len(keys))
+
+
+async def fetch_entitlement(user_id, db: AsyncSession) -> date | None:
+    today = date.today()
+
+    latest_end_date = (
+        select(func.max(Subscriptions.end_date))
+        .where(
             and_(
                 Subscriptions.user_id == user_id,
                 Subscriptions.is_active == True,
-                Subscriptions.end_date >= date.today(),
+                Subscriptions.start_date <= today,
+                Subscriptions.end_date >= today,
             )
         )
+        .scalar_subquery()
+    )
+    has_daily_sub = exists().where(
+        and_(
+            DailySubscriptions.user_id == user_id,
+            DailySubscriptions.subscription_date == today,
+        )
     )
-    subscription = result.scalars().first()
 
-    result = await db.execute(
-        select(DailySubscriptions).where(
+    result = await db.execute(select(latest_end_date, has_daily_sub))
+    end_date, daily = result.one()
+
+    if end_date:
+        return end_date
+    return today if daily else None
+
+
+def is_entitled(user_id, day):
+    """
+    SQL condition that is true when `user_id` may train on `day`. Both may
+    be values or columns, so live check-ins and controller batches share
+    the same rule.
+    """
+    return or_(
+        exists().where(
+            and_(
+                Subscriptions.user_id == user_id,
+                Subscriptions.is_active == True,
+                Subscriptions.start_date <= day,
+                Subscriptions.end_date >= day,
+            )
+        ),
+        exists().where(
             and_(
                 DailySubscriptions.user_id == user_id,
-                DailySubscriptions.subscription_date == date.today(),
+                DailySubscriptions.subscription_date == day,
             )
+        ),
+    )
+
+
+async def record_attendance(user_id, gym_id, db: AsyncSession) -> bool:
+    """
+    Check the user in for today in a single statement.
+
+    The attendance row is inserted only when the user is entitled, and the
+    unique (user_id, gym_id, date) constraint turns a duplicate tap into a
+    no-op. The same statement bumps today's gym_daily_stats row through a
+    data-modifying CTE, so the counter only moves when a row was inserted.
+    Returns False when nothing was inserted.
+    """
+    today = date.today()
+
+    inserted = (
+        pg_insert(Attendance)
+        .from_select(
+            ["id", "user_id", "gym_id", "date"],
+            select(
+                literal(uuid.uuid4(), UUID(as_uuid=True)),
+                literal(user_id, UUID(as_uuid=True)),
+                literal(gym_id, UUID(as_uuid=True)),
+                literal(today, Date),
+            ).where(is_entitled(user_id, today)),
         )
+        .on_conflict_do_nothing(index_elements=["user_id", "gym_id", "date"])
+        .returning(Attendance.gym_id, Attendance.date)
+        .cte("inserted")
+    )
+
+    stmt = pg_insert(GymDailyStats).from_select(
+        ["gym_id", "day", "attendance_count"],
+        select(inserted.c.gym_id, inserted.c.date, literal(1)),
     )
-    daily_sub = result.scalars().first()
-    if subscription or daily_sub:
-        return True
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[GymDailyStats.gym_id, GymDailyStats.day],
+        set_={
+            "attendance_count": GymDailyStats.attendance_count
+            + stmt.excluded.attendance_count
+        },
+    ).returning(GymDailyStats.day)
+
+    result = await db.execute(stmt)
+    return result.first() is not None
+
+
+SCAN_CHUNK_SIZE = 5000
 
-    return False
+
+def scan_day(timestamp: datetime) -> date:
+    """
+    Local calendar day of a controller scan, matching the server-side
+    date.today() used for live check-ins. Offset-aware timestamps are
+    converted to the server's timezone first; naive ones are already local.
+    """
+    return timestamp.astimezone().date()
+
+
+async def fetch_entitled_scans(pairs: list, gym_id, db: AsyncSession) -> set:
+    """
+    Return the (user_id, day) pairs whose user belongs to the gym and was
+    entitled to train on that day, checked set-based per chunk.
+    """
+    entitled = set()
+
+    for start in range(0, len(pairs), SCAN_CHUNK_SIZE):
+        scans = values(
+            column("user_id", UUID(as_uuid=True)),
+            column("day", Date),
+            name="scans",
+        ).data(pairs[start : start + SCAN_CHUNK_SIZE])
+
+        result = await db.execute(
+            select(scans.c.user_id, scans.c.day)
+            .select_from(scans.join(Users, Users.id == scans.c.user_id))
+            .where(Users.gym_id == gym_id, is_entitled(scans.c.user_id, scans.c.day))
+        )
+        entitled.update((row.user_id, row.day) for row in result.all())
+
+    return entitled
+
+
+async def insert_attendance_batch(pairs: list, gym_id, db: AsyncSession) -> set:
+    """
+    Multi-row upsert of attendance for (user_id, day) pairs. Pairs already
+    checked in are skipped by the unique constraint. Returns the pairs that
+    were inserted and adds them to the daily rollup.
+    """
+    inserted = set()
+
+    for start in range(0, len(pairs), SCAN_CHUNK_SIZE):
+        chunk = pairs[start : start + SCAN_CHUNK_SIZE]
+        result = await db.execute(
+            pg_insert(Attendance)
+            .values(
+                [
+                    {
+                        "id": uuid.uuid4(),
+                        "user_id": user_id,
+                        "gym_id": gym_id,
+                        "date": day,
+                    }
+                    for user_id, day in chunk
+                ]
+            )
+            .on_conflict_do_nothing(index_elements=["user_id", "gym_id", "date"])
+            .returning(Attendance.user_id, Attendance.date)
+        )
+        inserted.update((row.user_id, row.date) for row in result.all())
+
+    if inserted:
+        per_day = Counter(day for _, day in inserted)
+        stmt = pg_insert(GymDailyStats).values(
+            [
+                {"gym_id": gym_id, "day": day, "attendance_count": count}
+                for day, count in per_day.items()
+            ]
+        )
+        await db.execute(
+            stmt.on_conflict_do_update(
+                index_elements=[GymDailyStats.gym_id, GymDailyStats.day],
+                set_={
+                    "attendance_count": GymDailyStats.attendance_count
+                    + stmt.excluded.attendance_count
+                },
+            )
+        )
+
+    return inserted
+
+
+async def get_active_subscription(user_id: str, db: AsyncSession) -> bool:
+    try:
+        cached = await redis.get(entitlement_cache_key(user_id))
+    except RedisError:
+        logger.warning("Redis unavailable, reading entitlement from the database")
+        return await fetch_entitlement(user_id, db) is not None
+
+    if cached is not None:
+        return bool(cached) and date.fromisoformat(cached) >= date.today()
+
+    entitled_until = await fetch_entitlement(user_id, db)
+    await set_entitlement(user_id, entitled_until, only_if_missing=True)
+
+    return entitled_until is not None
 
 
 async def fetch_profit_from_db(start_date, end_date, db: AsyncSession, gym_id: str):
 
     result = await db.execute(
-        select(func.sum(Payment.amount)).where(
+        select(func.sum(GymDailyStats.card_revenue + GymDailyStats.cash_revenue)).where(
             and_(
-                Payment.payment_date.between(start_date, end_date),
-                Payment.gym_id == gym_id,
+                GymDailyStats.day.between(start_date, end_date),
+                GymDailyStats.gym_id == gym_id,
             )
         )
     )
@@ -49,16 +277,14 @@ async def fetch_profit_from_db(start_date, end_date, db: AsyncSession, gym_id: s
 
 
 async def check_gym_status(gym_id: str, db: AsyncSession) -> bool:
-    result = await db.execute(select(Gyms).where(Gyms.id == gym_id))
-
-    gym = result.scalars().first()
+    gym = await gym_settings_cache.get(gym_id, db)
 
     if not gym:
         raise HTTPException(
             detail="Gyms does not exits", status_code=status.HTTP_400_BAD_REQUEST
         )
 
-    return gym.is_active
+    return gym["is_active"]
 
 
 async def is_superuser_exists(db: AsyncSession) -> bool:
@@ -80,4 +306,30 @@ async def cache_time_for_linegraph(db: AsyncSession) -> int:
 
 
 async def cache_time_for_barchart(db: AsyncSession) -> int:
-    pass  # TO DO: calculate cache time until the end of the month
+
+    now = datetime.now()
+
+    next_month = (now.replace(day=28) + timedelta(days=4)).replace(
+        day=1, hour=0, minute=0, second=0, microsecond=0
+    )
+
+    remaining_seconds = int((next_month - now).total_seconds())
+    return remaining_seconds
+
+
+def barchart_cache_key(gym_id: str) -> str:
+    return f"{settings.MONTHLY_PROFIT}:{gym_id}"
+
+
+async def invalidate_barchart_caches():
+    """
+    Drop every gym's cached bar chart. Payments are always dated today, so
+    the closed months it shows only change when the rollup is rebuilt; the
+    month-end TTL covers everything else.
+    """
+    try:
+        keys = [key async for key in redis.scan_iter(barchart_cache_key("*"))]
+        if keys:
+            await redis.delete(*keys)
+    except RedisError:
+        logger.warning("Redis unavailable, bar chart caches expire at month end")
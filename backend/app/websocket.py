@@ -1,22 +1,186 @@
 import json
+import asyncio
+import logging
+from collections import defaultdict
 from fastapi import WebSocket
+from redis.exceptions import RedisError
 
+from .config import settings
+from .rate_limiter import redis
+from .schemas.users import UserListResponse
+
+logger = logging.getLogger("websocket")
+
+CHANNEL_PREFIX = "ws:gym:"
 
 
 class ConnectionManager:
-    def __init__(self):
-        self.active_connections: list[WebSocket] = []
-        
+    """
+    Tracks WebSocket connections grouped by gym.
+
+    Broadcasts are published to a per-gym Redis channel; every worker runs a
+    listener that relays channel messages to its own sockets for that gym,
+    so peers connected to other processes receive them too.
+    """
+
+    def __init__(self, send_timeout: float):
+        self.send_timeout = send_timeout
+        self.active_connections: dict[str, set[WebSocket]] = defaultdict(set)
+        self._listener: asyncio.Task | None = None
+
     async def connect(self, websocket: WebSocket):
         await websocket.accept()
-        self.active_connections.append(websocket)
-        
+
+    def join(self, websocket: WebSocket, gym_id: str):
+        gym_id = str(gym_id)
+        for gym, connections in self.active_connections.items():
+            if gym != gym_id:
+                connections.discard(websocket)
+        self.active_connections[gym_id].add(websocket)
+
     async def disconnect(self, websocket: WebSocket):
-        self.active_connections.remove(websocket)
-        
-    async def broadcast(self, message: dict):
-        for conn in self.active_connections:
-            await conn.send_json(message)
-            
-            
-manager = ConnectionManager()
\ No newline at end of file
+        for gym_id in list(self.active_connections):
+            self.active_connections[gym_id].discard(websocket)
+            if not self.active_connections[gym_id]:
+                del self.active_connections[gym_id]
+
+    async def broadcast(self, gym_id: str, message: dict):
+        try:
+            await redis.publish(f"{CHANNEL_PREFIX}{gym_id}", json.dumps(message))
+        except RedisError:
+            logger.warning("Redis unavailable, broadcasting to local sockets only")
+            await self.send_local(str(gym_id), message)
+
+    async def send_local(self, gym_id: str, message: dict):
+        connections = list(self.active_connections.get(gym_id, ()))
+        if not connections:
+            return
+
+        results = await asyncio.gather(
+            *(
+                asyncio.wait_for(conn.send_json(message), self.send_timeout)
+                for conn in connections
+            ),
+            return_exceptions=True,
+        )
+
+        # Sockets that time out or fail are slow or dead consumers; drop them
+        # so they do not hold up the next broadcast
+        for conn, result in zip(connections, results):
+            if isinstance(result, Exception):
+                logger.warning("Evicting websocket for gym_id=%s: %r", gym_id, result)
+                await self.disconnect(conn)
+                try:
+                    await conn.close()
+                except Exception:
+                    pass
+
+    async def _listen(self):
+        while True:
+            pubsub = redis.pubsub()
+            try:
+                await pubsub.psubscribe(f"{CHANNEL_PREFIX}*")
+                # Redis is reachable again; resync gyms that missed a delta
+                await resync_unversioned_gyms()
+                async for message in pubsub.listen():
+                    if message["type"] != "pmessage":
+                        continue
+                    # A bad payload or failed relay must not kill the
+                    # listener for every gym on this worker
+                    try:
+                        gym_id = message["channel"][len(CHANNEL_PREFIX) :]
+                        await self.send_local(gym_id, json.loads(message["data"]))
+                    except Exception:
+                        logger.exception(
+                            "Failed to relay message on %s", message["channel"]
+                        )
+            except RedisError:
+                logger.warning("Lost Redis pub/sub connection, reconnecting")
+                await asyncio.sleep(1)
+            finally:
+                await pubsub.aclose()
+
+    async def start(self):
+        if self._listener is None:
+            self._listener = asyncio.create_task(self._listen())
+
+    async def stop(self):
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            self._listener = None
+
+
+manager = ConnectionManager(send_timeout=settings.WS_SEND_TIMEOUT)
+
+
+def users_version_key(gym_id) -> str:
+    return f"users:version:{gym_id}"
+
+
+async def get_users_version(gym_id) -> int:
+    version = await redis.get(users_version_key(gym_id))
+    return int(version or 0)
+
+
+# Gyms with a change that could not be versioned while Redis was down
+unversioned_gyms: set[str] = set()
+
+
+async def resync_unversioned_gyms():
+    """
+    Bump the version of every gym that missed a delta and tell all of its
+    clients to take a fresh snapshot. Gyms stay pending while Redis fails.
+    """
+    for gym_id in list(unversioned_gyms):
+        try:
+            await redis.incr(users_version_key(gym_id))
+        except RedisError:
+            return
+        unversioned_gyms.discard(gym_id)
+        await manager.broadcast(gym_id, {"type": "users.resync"})
+
+
+async def publish_user_change(gym_id, op: str, user, active_sub: bool | None = None):
+    """
+    Push an insert/update/delete delta for a gym's client list.
+
+    Every change bumps a per-gym version shared by all workers; clients that
+    see a gap in versions request a fresh snapshot instead. `active_sub`,
+    when the change determines it, tells clients filtering like
+    `GET /users?active_sub=true` whether the user now matches.
+    """
+    if user.role != "client" or gym_id is None:
+        return
+    gym_id = str(gym_id)
+
+    if unversioned_gyms:
+        await resync_unversioned_gyms()
+
+    # The write has already committed, so a Redis outage must not fail the
+    # request. Without a version the delta cannot be applied safely: sockets
+    # on this worker resync now, and every client of the gym is told to
+    # once Redis is back.
+    try:
+        version = await redis.incr(users_version_key(gym_id))
+    except RedisError:
+        logger.warning(
+            "Redis unavailable, deferring users.resync for gym_id=%s", gym_id
+        )
+        unversioned_gyms.add(gym_id)
+        await manager.send_local(gym_id, {"type": "users.resync"})
+        return
+
+    if op == "delete":
+        data = {"id": str(user.id)}
+    else:
+        data = UserListResponse.model_validate(user).model_dump(mode="json")
+        if active_sub is not None:
+            data["active_sub"] = active_sub
+
+    await manager.broadcast(
+        gym_id, {"type": "users.delta", "op": op, "version": version, "data": data}
+    )
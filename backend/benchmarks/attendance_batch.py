@@ -0,0 +1,92 @@
+"""
+Controller attendance batches: one entitlement check and insert per scan
+versus the set-based fetch_entitled_scans/insert_attendance_batch path.
+
+    python -m benchmarks.attendance_batch --clients 2000 --days 5
+
+Every run is rolled back, so both paths ingest the same scans.
+"""
+
+import asyncio
+import argparse
+import uuid
+from datetime import date, timedelta
+
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from app.database import async_session
+from app.models import Attendance, GymDailyStats
+from app.utils import fetch_entitled_scans, insert_attendance_batch, is_entitled
+
+from .common import best_of, seeded_gym
+
+
+async def per_scan(pairs: list, gym_id, db) -> int:
+    inserted = 0
+    for user_id, day in pairs:
+        if not await db.scalar(select(is_entitled(user_id, day))):
+            continue
+        result = await db.execute(
+            pg_insert(Attendance)
+            .values(id=uuid.uuid4(), user_id=user_id, gym_id=gym_id, date=day)
+            .on_conflict_do_nothing(index_elements=["user_id", "gym_id", "date"])
+            .returning(Attendance.id)
+        )
+        if result.first() is None:
+            continue
+        stmt = pg_insert(GymDailyStats).values(
+            gym_id=gym_id, day=day, attendance_count=1
+        )
+        await db.execute(
+            stmt.on_conflict_do_update(
+                index_elements=[GymDailyStats.gym_id, GymDailyStats.day],
+                set_={"attendance_count": GymDailyStats.attendance_count + 1},
+            )
+        )
+        inserted += 1
+    await db.rollback()
+    return inserted
+
+
+async def batched(pairs: list, gym_id, db) -> int:
+    entitled = await fetch_entitled_scans(pairs, gym_id, db)
+    inserted = await insert_attendance_batch(
+        [pair for pair in pairs if pair in entitled], gym_id, db
+    )
+    await db.rollback()
+    return len(inserted)
+
+
+async def benchmark(clients: int, days: int, rounds: int):
+    today = date.today()
+    async with seeded_gym(clients=clients) as (gym_id, client_ids, _):
+        # Past days only: today's check-ins are already seeded
+        pairs = [
+            (user_id, today - timedelta(days=offset))
+            for offset in range(1, days + 1)
+            for user_id in client_ids
+        ]
+        async with async_session() as db:
+            checked_in = await batched(pairs, gym_id, db)
+            before = await best_of(per_scan, pairs, gym_id, db, rounds=rounds)
+            after = await best_of(batched, pairs, gym_id, db, rounds=rounds)
+
+    print(f"{len(pairs)} scans, {checked_in} entitled")
+    print(
+        f"per scan {before * 1000:9.1f} ms  "
+        f"batched {after * 1000:7.1f} ms  ({before / after:.1f}x)"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--clients", type=int, default=2000)
+    parser.add_argument("--days", type=int, default=5)
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+    asyncio.run(benchmark(args.clients, args.days, args.rounds))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+"""
+Shared helpers for the benchmarks in this package.
+
+Benchmarks run against the database and Redis configured in `.env`. Data
+is seeded under a throwaway gym that is deleted afterwards; every table
+cascades from `gyms`.
+"""
+
+import time
+import uuid
+from contextlib import asynccontextmanager
+from datetime import date, timedelta
+
+from sqlalchemy import delete, insert
+
+from app.database import async_session
+from app.models import (
+    Attendance,
+    Gyms,
+    GymDailyStats,
+    Payment,
+    Products,
+    Subscriptions,
+    SubscriptionPlans,
+    Users,
+)
+
+PLAN_TYPES = ("monthly", "quarterly", "yearly")
+
+
+async def best_of(func, *args, rounds: int = 20) -> float:
+    """Fastest of `rounds` awaited calls, in seconds."""
+    best = float("inf")
+    for _ in range(rounds):
+        start = time.perf_counter()
+        await func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def percentile(samples: list[float], fraction: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def user_rows(gym_id: uuid.UUID, count: int, role: str = "client") -> list[dict]:
+    prefix = f"b{gym_id.hex[:6]}{role[0]}"
+    return [
+        {
+            "id": uuid.uuid4(),
+            "first_name": f"Bench{i}",
+            "last_name": role.title(),
+            "phone_number": f"{prefix}{i:07d}",
+            "role": role,
+            "hashed_password": "benchmark",
+            "date_of_birth": date(1990, 1, 1),
+            "is_active": True,
+            "is_superuser": False,
+            "gym_id": gym_id,
+        }
+        for i in range(count)
+    ]
+
+
+@asynccontextmanager
+async def seeded_gym(
+    clients: int = 1000, trainers: int = 20, products: int = 0, stock: int = 0
+):
+    """
+    A gym with `clients` members, each on an active plan with a payment and
+    a check-in today, plus `trainers` trainers and `products` products
+    holding `stock` units each. Yields `(gym_id, client_ids, product_ids)`.
+    """
+    gym_id = uuid.uuid4()
+    today = date.today()
+    clients_data = user_rows(gym_id, clients)
+    plans = [
+        {
+            "id": uuid.uuid4(),
+            "type": plan_type,
+            "price": 300000,
+            "duration_days": 30,
+            "is_active": True,
+            "gym_id": gym_id,
+        }
+        for plan_type in PLAN_TYPES
+    ]
+    product_rows = [
+        {
+            "id": uuid.uuid4(),
+            "name": f"Bench product {i}",
+            "selling_price": 10000,
+            "purchase_price": 7000,
+            "total_amount": stock,
+            "current_amount": stock,
+            "created_at": today,
+            "gym_id": gym_id,
+        }
+        for i in range(products)
+    ]
+
+    async with async_session() as db:
+        await db.execute(
+            insert(Gyms),
+            [{"id": gym_id, "name": "Benchmark gym", "marketplace_enabled": True}],
+        )
+        await db.execute(
+            insert(Users), clients_data + user_rows(gym_id, trainers, "trainer")
+        )
+        await db.execute(insert(SubscriptionPlans), plans)
+        if clients_data:
+            await db.execute(
+                insert(Subscriptions),
+                [
+                    {
+                        "id": uuid.uuid4(),
+                        "payment_method": "card",
+                        "start_date": today - timedelta(days=i % 30),
+                        "end_date": today + timedelta(days=30 - i % 30),
+                        "is_active": True,
+                        "gym_id": gym_id,
+                        "user_id": user["id"],
+                        "plan_id": plans[i % len(plans)]["id"],
+                    }
+                    for i, user in enumerate(clients_data)
+                ],
+            )
+            await db.execute(
+                insert(Payment),
+                [
+                    {
+                        "id": uuid.uuid4(),
+                        "amount": 300000,
+                        "payment_date": today - timedelta(days=i % 30),
+                        "payment_method": ("card", "cash")[i % 2],
+                        "gym_id": gym_id,
+                        "user_id": user["id"],
+                    }
+                    for i, user in enumerate(clients_data)
+                ],
+            )
+            await db.execute(
+                insert(Attendance),
+                [
+                    {
+                        "id": uuid.uuid4(),
+                        "date": today,
+                        "gym_id": gym_id,
+                        "user_id": user["id"],
+                    }
+                    for user in clients_data
+                ],
+            )
+            await db.execute(
+                insert(GymDailyStats),
+                [{"gym_id": gym_id, "day": today, "attendance_count": clients}],
+            )
+        if product_rows:
+            await db.execute(insert(Products), product_rows)
+        await db.commit()
+
+    try:
+        yield (
+            gym_id,
+            [user["id"] for user in clients_data],
+            [product["id"] for product in product_rows],
+        )
+    finally:
+        async with async_session() as db:
+            await db.execute(delete(Gyms).where(Gyms.id == gym_id))
+            await db.commit()
@@ -0,0 +1,103 @@
+"""
+Dashboard user and subscription stats: the former per-count queries versus
+the single-statement aggregates in app/stats.py.
+
+    python -m benchmarks.dashboard_stats --clients 5000
+"""
+
+import asyncio
+import argparse
+from datetime import date
+
+from sqlalchemy import select, and_, func
+
+from app.database import async_session
+from app.models import Attendance, Subscriptions, SubscriptionPlans, Users
+from app.stats import fetch_subscription_stats, fetch_user_stats
+
+from .common import best_of, seeded_gym
+
+
+async def legacy_user_stats(gym_id, db) -> dict:
+    result1 = await db.execute(
+        select(func.count(Users.id)).where(
+            and_(
+                Users.role == "client",
+                Users.is_superuser == False,
+                Users.gym_id == gym_id,
+            )
+        )
+    )
+    result2 = await db.execute(
+        select(func.count(Users.id)).where(
+            and_(Users.role == "trainer", Users.gym_id == gym_id)
+        )
+    )
+    result3 = await db.execute(
+        select(func.count(Attendance.id)).where(
+            Attendance.date == func.current_date(), Attendance.gym_id == gym_id
+        )
+    )
+    return {
+        "total_active_users": result1.scalar(),
+        "total_trainers": result2.scalar(),
+        "today_attendance": result3.scalar(),
+    }
+
+
+async def legacy_subscription_stats(gym_id, db) -> dict:
+    result1 = await db.execute(
+        select(func.count(Subscriptions.id)).where(
+            and_(
+                Subscriptions.is_active == True,
+                Subscriptions.gym_id == gym_id,
+                Subscriptions.end_date >= date.today(),
+            )
+        )
+    )
+    result = await db.execute(
+        select(SubscriptionPlans.type, func.count(Subscriptions.id))
+        .outerjoin(Subscriptions, Subscriptions.plan_id == SubscriptionPlans.id)
+        .where(
+            Subscriptions.is_active == True,
+            Subscriptions.gym_id == gym_id,
+            Subscriptions.end_date >= date.today(),
+        )
+        .group_by(SubscriptionPlans.type)
+    )
+    return {
+        "by_type": result.all(),
+        "total_active_subscriptions": result1.scalar(),
+    }
+
+
+async def benchmark(clients: int, rounds: int):
+    async with seeded_gym(clients=clients) as (gym_id, _, _):
+        async with async_session() as db:
+            cases = [
+                ("user stats", legacy_user_stats, fetch_user_stats),
+                (
+                    "subscription stats",
+                    legacy_subscription_stats,
+                    fetch_subscription_stats,
+                ),
+            ]
+            for name, old, new in cases:
+                before = await best_of(old, gym_id, db, rounds=rounds)
+                after = await best_of(new, gym_id, db, rounds=rounds)
+                print(
+                    f"{name:<20} before {before * 1000:7.2f} ms  "
+                    f"after {after * 1000:7.2f} ms  ({before / after:.1f}x)"
+                )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--clients", type=int, default=5000)
+    parser.add_argument("--rounds", type=int, default=50)
+    args = parser.parse_args()
+    asyncio.run(benchmark(args.clients, args.rounds))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+Local load test: throughput of the production server from 1 to N workers.
+
+    python -m benchmarks.loadtest --max-workers 8 --path /health/live
+
+For each worker count a server is started with `app.server` on a spare
+port and driven by keep-alive HTTP/1.1 clients spread over several
+processes, so the client side is not the bottleneck.
+"""
+
+import os
+import re
+import sys
+import time
+import asyncio
+import argparse
+import subprocess
+import urllib.request
+from concurrent.futures import ProcessPoolExecutor
+
+HOST = "127.0.0.1"
+CONTENT_LENGTH = re.compile(rb"content-length:\s*(\d+)", re.IGNORECASE)
+
+
+async def client(port: int, path: str, deadline: float) -> int:
+    reader, writer = await asyncio.open_connection(HOST, port)
+    request = f"GET {path} HTTP/1.1\r\nHost: {HOST}\r\n\r\n".encode()
+    completed = 0
+    try:
+        while time.perf_counter() < deadline:
+            writer.write(request)
+            await writer.drain()
+            headers = await reader.readuntil(b"\r\n\r\n")
+            await reader.readexactly(int(CONTENT_LENGTH.search(headers).group(1)))
+            completed += 1
+    finally:
+        writer.close()
+    return completed
+
+
+async def drive(port: int, path: str, connections: int, duration: float) -> int:
+    deadline = time.perf_counter() + duration
+    results = await asyncio.gather(
+        *(client(port, path, deadline) for _ in range(connections))
+    )
+    return sum(results)
+
+
+def run_client_process(port: int, path: str, connections: int, duration: float):
+    return asyncio.run(drive(port, path, connections, duration))
+
+
+def wait_until_live(port: int, timeout: float = 60.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            urllib.request.urlopen(f"http://{HOST}:{port}/health/live", timeout=1)
+            return
+        except OSError:
+            time.sleep(0.5)
+    raise RuntimeError(f"Server on port {port} did not come up")
+
+
+def measure(workers: int, args) -> float:
+    port = args.port + workers
+    env = {**os.environ, "WEB_CONCURRENCY": str(workers), "SERVER_PORT": str(port)}
+    server = subprocess.Popen([sys.executable, "-m", "app.server"], env=env)
+    try:
+        wait_until_live(port)
+        with ProcessPoolExecutor(args.client_processes) as pool:
+            futures = [
+                pool.submit(
+                    run_client_process,
+                    port,
+                    args.path,
+                    args.connections // args.client_processes,
+                    args.duration,
+                )
+                for _ in range(args.client_processes)
+            ]
+            total = sum(future.result() for future in futures)
+        return total / args.duration
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--path", default="/health/live")
+    parser.add_argument("--connections", type=int, default=64)
+    parser.add_argument("--client-processes", type=int, default=4)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--port", type=int, default=18000)
+    args = parser.parse_args()
+
+    counts = sorted({1, *(2**i for i in range(1, 8)), args.max_workers})
+    baseline = None
+    for workers in (count for count in counts if count <= args.max_workers):
+        throughput = measure(workers, args)
+        baseline = baseline or throughput
+        print(
+            f"{workers:>3} workers: {throughput:>9.0f} req/s "
+            f"({throughput / baseline:.2f}x)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+Request throughput with logging enabled and disabled:
+
+    python -m benchmarks.logging_overhead
+"""
+
+import time
+import asyncio
+import logging
+
+from fastapi import FastAPI
+
+from app.logging_config import setup_logging
+
+
+async def benchmark(requests: int = 5000):
+    app = FastAPI()
+    logger = logging.getLogger("benchmark")
+
+    @app.get("/")
+    async def index():
+        logger.info("Handling benchmark request")
+        return {"message": "ok"}
+
+    scope = {
+        "type": "http",
+        "method": "GET",
+        "path": "/",
+        "raw_path": b"/",
+        "root_path": "",
+        "query_string": b"",
+        "headers": [],
+        "http_version": "1.1",
+        "scheme": "http",
+        "server": ("testserver", 80),
+        "client": ("127.0.0.1", 1234),
+    }
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    async def run() -> float:
+        start = time.perf_counter()
+        for _ in range(requests):
+            await app(dict(scope), receive, send)
+        return requests / (time.perf_counter() - start)
+
+    setup_logging()
+    enabled = await run()
+    logging.disable(logging.CRITICAL)
+    disabled = await run()
+    logging.disable(logging.NOTSET)
+
+    print(f"logging enabled:  {enabled:.0f} req/s")
+    print(f"logging disabled: {disabled:.0f} req/s")
+
+
+if __name__ == "__main__":
+    asyncio.run(benchmark())
@@ -0,0 +1,111 @@
+"""
+Market checkout under contention: 50 concurrent sellers of one product,
+and a multi-item basket sold one request per item versus checkout_basket.
+
+    python -m benchmarks.market --sellers 50 --items 10
+
+The endpoint functions are called directly, each with its own session from
+the application pool, as they would be under concurrent requests.
+"""
+
+import asyncio
+import argparse
+import time
+
+from sqlalchemy import select
+
+from app.database import async_session
+from app.endpoints.market import checkout_basket, sell_product
+from app.models import Products
+from app.schemas.products import BasketCheckoutRequest, ProductSellRequest
+
+from .common import best_of, percentile, seeded_gym
+
+STOCK = 1_000_000
+
+
+async def sell(gym_id, product_id, quantity: int = 1):
+    async with async_session() as db:
+        await sell_product(
+            ProductSellRequest(
+                product_id=str(product_id), quantity=quantity, payment_method="cash"
+            ),
+            gym_id=str(gym_id),
+            db=db,
+        )
+
+
+async def contended_sales(gym_id, product_id, sellers: int, sales: int):
+    latencies = []
+
+    async def seller():
+        for _ in range(sales):
+            start = time.perf_counter()
+            await sell(gym_id, product_id)
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(seller() for _ in range(sellers)))
+    elapsed = time.perf_counter() - start
+
+    async with async_session() as db:
+        remaining = await db.scalar(
+            select(Products.current_amount).where(Products.id == product_id)
+        )
+
+    print(
+        f"{sellers} sellers x {sales} sales: {len(latencies) / elapsed:7.0f} sales/s  "
+        f"p50 {percentile(latencies, 0.5) * 1000:6.1f} ms  "
+        f"p99 {percentile(latencies, 0.99) * 1000:6.1f} ms  "
+        f"stock {STOCK} -> {remaining}"
+    )
+
+
+async def per_item(gym_id, product_ids: list):
+    for product_id in product_ids:
+        await sell(gym_id, product_id)
+
+
+async def basket(gym_id, product_ids: list):
+    async with async_session() as db:
+        await checkout_basket(
+            BasketCheckoutRequest(
+                items=[
+                    {"product_id": product_id, "quantity": 1}
+                    for product_id in product_ids
+                ],
+                payment_method="cash",
+            ),
+            gym_id=str(gym_id),
+            db=db,
+        )
+
+
+async def benchmark(sellers: int, sales: int, items: int, rounds: int):
+    async with seeded_gym(clients=0, trainers=0, products=items, stock=STOCK) as (
+        gym_id,
+        _,
+        product_ids,
+    ):
+        await contended_sales(gym_id, product_ids[0], sellers, sales)
+
+        before = await best_of(per_item, gym_id, product_ids, rounds=rounds)
+        after = await best_of(basket, gym_id, product_ids, rounds=rounds)
+        print(
+            f"{items}-item basket: per item {before * 1000:7.1f} ms  "
+            f"checkout_basket {after * 1000:7.1f} ms  ({before / after:.1f}x)"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sellers", type=int, default=50)
+    parser.add_argument("--sales", type=int, default=20)
+    parser.add_argument("--items", type=int, default=10)
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(benchmark(args.sellers, args.sales, args.items, args.rounds))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Event-loop latency during a burst of concurrent logins, with bcrypt run
+inline on the loop versus on the password_hasher thread pool.
+
+    python -m benchmarks.password_hashing --logins 50
+
+A probe task sleeps for 10 ms in a loop; how late it wakes up is the delay
+every other request on the worker would see.
+"""
+
+import asyncio
+import argparse
+import time
+
+from app.security import password_hasher, pwd_context, verify_password
+
+from .common import percentile
+
+PROBE_INTERVAL = 0.01
+
+
+async def inline_verify(password: str, hashed: str) -> bool:
+    return pwd_context.verify(password, hashed)
+
+
+async def probe(lags: list[float], done: asyncio.Event):
+    while not done.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(PROBE_INTERVAL)
+        lags.append(time.perf_counter() - start - PROBE_INTERVAL)
+
+
+async def login_burst(verify, logins: int, hashed: str) -> tuple[float, list]:
+    lags = []
+    done = asyncio.Event()
+    probe_task = asyncio.create_task(probe(lags, done))
+    await asyncio.sleep(PROBE_INTERVAL)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(verify("benchmark", hashed) for _ in range(logins)))
+    elapsed = time.perf_counter() - start
+
+    done.set()
+    await probe_task
+    return elapsed, lags
+
+
+async def benchmark(logins: int):
+    hashed = pwd_context.hash("benchmark")
+    print(f"{logins} logins, {password_hasher.max_workers} hasher threads")
+
+    for name, verify in (("inline", inline_verify), ("executor", verify_password)):
+        elapsed, lags = await login_burst(verify, logins, hashed)
+        print(
+            f"{name:<9} total {elapsed * 1000:7.0f} ms  "
+            f"loop lag p50 {percentile(lags, 0.5) * 1000:6.1f} ms  "
+            f"p99 {percentile(lags, 0.99) * 1000:6.1f} ms  "
+            f"max {max(lags) * 1000:6.1f} ms"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--logins", type=int, default=50)
+    args = parser.parse_args()
+    asyncio.run(benchmark(args.logins))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+"""
+Rate limiter overhead per request for the Redis and in-process paths.
+
+    python -m benchmarks.rate_limiter
+"""
+
+import time
+import asyncio
+
+from app.rate_limiter import RateLimiter, local_buckets, redis
+
+
+async def benchmark(iterations: int = 10000):
+    limiter = RateLimiter(iterations * 2, 60)
+
+    start = time.perf_counter()
+    for i in range(iterations):
+        await limiter.take(f"ratelimit:benchmark:{i % 100}")
+    redis_us = (time.perf_counter() - start) / iterations * 1e6
+
+    start = time.perf_counter()
+    for i in range(iterations):
+        local_buckets.take(
+            f"ratelimit:benchmark:{i % 100}", limiter.request_limit, limiter.rate
+        )
+    local_us = (time.perf_counter() - start) / iterations * 1e6
+
+    keys = [key async for key in redis.scan_iter("ratelimit:benchmark:*")]
+    if keys:
+        await redis.delete(*keys)
+
+    print(f"redis (EVALSHA): {redis_us:.1f} us/request")
+    print(f"in-process:      {local_us:.1f} us/request")
+
+
+if __name__ == "__main__":
+    asyncio.run(benchmark())
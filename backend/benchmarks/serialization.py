@@ -0,0 +1,124 @@
+"""
+Serialization micro-benchmark for a 5k-user `get_user` style payload.
+
+    python -m benchmarks.serialization
+
+The old path builds nested dicts by hand and renders them the way FastAPI
+does without a response model (jsonable_encoder + stdlib json). The new
+path validates ORM-like objects against `UserDetailResponse` and renders
+with orjson, as the endpoints now do.
+"""
+
+import time
+from datetime import date, timedelta
+from types import SimpleNamespace
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, ORJSONResponse
+from pydantic import TypeAdapter
+
+from app.schemas.users import UserDetailResponse
+
+USERS = 5000
+
+
+def make_user(i: int) -> SimpleNamespace:
+    today = date.today()
+    plan = SimpleNamespace(
+        type="monthly", price=300000, duration_days=30, is_active=True
+    )
+    return SimpleNamespace(
+        first_name=f"User{i}",
+        last_name="Benchmark",
+        phone_number=f"+998900{i:06d}",
+        date_of_birth=date(1990, 1, 1) + timedelta(days=i),
+        gender="male",
+        is_active=True,
+        payments=[
+            SimpleNamespace(
+                amount=300000,
+                payment_date=today - timedelta(days=30 * n),
+                payment_method="card",
+            )
+            for n in range(3)
+        ],
+        subscriptions=[
+            SimpleNamespace(
+                start_date=today - timedelta(days=30 * n),
+                end_date=today + timedelta(days=30 - 30 * n),
+                plan=plan,
+            )
+            for n in range(3)
+        ],
+        attendances=[SimpleNamespace(date=today - timedelta(days=n)) for n in range(3)],
+    )
+
+
+def old_path(users: list) -> bytes:
+    content = [
+        {
+            "first_name": user.first_name,
+            "last_name": user.last_name,
+            "phone_number": user.phone_number,
+            "date_of_birth": user.date_of_birth,
+            "gender": user.gender,
+            "is_active": user.is_active,
+            "payments": [
+                {
+                    "amount": pay.amount,
+                    "payment_date": pay.payment_date,
+                    "payment_method": pay.payment_method,
+                }
+                for pay in user.payments
+            ],
+            "subscriptions": [
+                {
+                    "start_date": sub.start_date,
+                    "end_date": sub.end_date,
+                    "days_left": (sub.end_date - date.today()).days,
+                    "plan": {
+                        "type": sub.plan.type,
+                        "price": sub.plan.price,
+                        "duration_days": sub.plan.duration_days,
+                        "is_active": sub.plan.is_active,
+                    },
+                }
+                for sub in user.subscriptions
+            ],
+            "attendances": [
+                {"date": attendance.date.isoformat()}
+                for attendance in user.attendances[:3]
+            ],
+        }
+        for user in users
+    ]
+    return JSONResponse(jsonable_encoder(content)).body
+
+
+def new_path(adapter: TypeAdapter, users: list) -> bytes:
+    content = adapter.validate_python(users, from_attributes=True)
+    return ORJSONResponse(adapter.dump_python(content, mode="json")).body
+
+
+def timed(func, *args, rounds: int = 5) -> float:
+    best = float("inf")
+    for _ in range(rounds):
+        start = time.perf_counter()
+        func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    users = [make_user(i) for i in range(USERS)]
+    adapter = TypeAdapter(list[UserDetailResponse])
+
+    old = timed(old_path, users)
+    new = timed(new_path, adapter, users)
+
+    print(f"dicts + jsonable_encoder + json: {old * 1000:.1f} ms")
+    print(f"response model + orjson:         {new * 1000:.1f} ms ({old / new:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
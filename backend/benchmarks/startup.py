@@ -0,0 +1,37 @@
+"""
+Worker cold-start time with create_all versus the Alembic revision check:
+
+    python -m benchmarks.startup
+"""
+
+import time
+import asyncio
+
+from app.cache import gym_settings_cache
+from app.database import engine
+from app.startup import startup, startup_state, warmup
+
+
+async def benchmark():
+    for create_all in (True, False):
+        await engine.dispose()
+        gym_settings_cache.local.clear()
+        startup_state.timings.clear()
+
+        start = time.perf_counter()
+        await startup(create_all=create_all)
+        await warmup()
+        total = time.perf_counter() - start
+
+        mode = "create_all" if create_all else "alembic check"
+        steps = ", ".join(
+            f"{name} {seconds * 1000:.1f} ms"
+            for name, seconds in startup_state.timings.items()
+        )
+        print(f"{mode}: {total * 1000:.1f} ms ({steps})")
+
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(benchmark())
@@ -0,0 +1,94 @@
+"""
+Time to first byte, total time and peak RSS of the dashboard stats export
+for each format.
+
+    python -m benchmarks.stats_export --clients 50000
+
+Each format runs in its own process, because peak RSS is a high-water mark
+that never goes back down.
+"""
+
+import asyncio
+import argparse
+import os
+import resource
+import subprocess
+import sys
+import time
+
+from app.endpoints.dashboard import build_xlsx_export, stream_text_export
+from app.schemas.admin import ExportFormat
+
+from .common import seeded_gym
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+async def export(gym_id: str, export_format: ExportFormat) -> tuple[float, float, int]:
+    start = time.perf_counter()
+
+    if export_format == ExportFormat.XLSX:
+        # The workbook is complete before FileResponse sends its first byte
+        path = await build_xlsx_export(gym_id)
+        first_byte = time.perf_counter() - start
+        size = os.path.getsize(path)
+        os.remove(path)
+        return first_byte, time.perf_counter() - start, size
+
+    first_byte = None
+    size = 0
+    async for chunk in stream_text_export(gym_id, export_format):
+        if first_byte is None:
+            first_byte = time.perf_counter() - start
+        size += len(chunk.encode())
+    return first_byte, time.perf_counter() - start, size
+
+
+def run_one(gym_id: str, export_format: ExportFormat):
+    baseline = peak_rss_mb()
+    first_byte, total, size = asyncio.run(export(gym_id, export_format))
+    peak = peak_rss_mb()
+    print(
+        f"{export_format.value:<7} first byte {first_byte * 1000:8.0f} ms  "
+        f"total {total * 1000:8.0f} ms  {size / 1e6:6.1f} MB  "
+        f"peak RSS {peak:6.0f} MB (+{peak - baseline:.0f})",
+        flush=True,
+    )
+
+
+async def benchmark(clients: int):
+    async with seeded_gym(clients=clients, trainers=0) as (gym_id, _, _):
+        print(f"{clients} subscriptions")
+        for export_format in ExportFormat:
+            subprocess.run(
+                [
+                    sys.executable,
+                    "-m",
+                    "benchmarks.stats_export",
+                    "--gym-id",
+                    str(gym_id),
+                    "--format",
+                    export_format.value,
+                ],
+                check=True,
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--clients", type=int, default=50000)
+    parser.add_argument("--gym-id", help=argparse.SUPPRESS)
+    parser.add_argument("--format", type=ExportFormat, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.gym_id:
+        run_one(args.gym_id, args.format)
+    else:
+        asyncio.run(benchmark(args.clients))
+
+
+if __name__ == "__main__":
+    main()
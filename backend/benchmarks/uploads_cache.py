@@ -0,0 +1,129 @@
+"""
+Requests and bytes a returning browser spends on product images, served by
+plain StaticFiles versus UploadsStaticFiles.
+
+    python -m benchmarks.uploads_cache --images 40 --legacy 10
+
+Images are random bytes under a temporary directory, named by their
+SHA-256 like new uploads, plus `--legacy` UUID-named ones. The browser is
+emulated: fresh cached responses are reused without a request and stale
+ones are revalidated with If-None-Match / If-Modified-Since.
+"""
+
+import os
+import re
+import uuid
+import asyncio
+import hashlib
+import argparse
+import tempfile
+
+from fastapi.staticfiles import StaticFiles
+
+from app.images import UploadsStaticFiles
+
+MAX_AGE = re.compile(r"max-age=(\d+)")
+
+
+async def get(app, path: str, headers: dict) -> tuple[int, dict, int]:
+    """Issue one GET straight to the ASGI app; returns (status, headers, bytes)."""
+    scope = {
+        "type": "http",
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "root_path": "",
+        "query_string": b"",
+        "headers": [(k.lower().encode(), v.encode()) for k, v in headers.items()],
+        "server": ("benchmark", 80),
+    }
+    response = {"headers": {}, "bytes": 0}
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            response["status"] = message["status"]
+            for key, value in message["headers"]:
+                response["headers"][key.decode()] = value.decode()
+                response["bytes"] += len(key) + len(value) + 4
+        elif message["type"] == "http.response.body":
+            response["bytes"] += len(message.get("body", b""))
+
+    await app(scope, receive, send)
+    return response["status"], response["headers"], response["bytes"]
+
+
+def is_fresh(headers: dict) -> bool:
+    cache_control = headers.get("cache-control", "")
+    if "no-cache" in cache_control:
+        return False
+    match = MAX_AGE.search(cache_control)
+    return bool(match) and int(match.group(1)) > 0
+
+
+async def visit(app, paths: list, cache: dict) -> tuple[int, int]:
+    requests = transferred = 0
+    for path in paths:
+        cached = cache.get(path)
+        if cached and is_fresh(cached):
+            continue
+
+        headers = {}
+        if cached and "etag" in cached:
+            headers["If-None-Match"] = cached["etag"]
+        if cached and "last-modified" in cached:
+            headers["If-Modified-Since"] = cached["last-modified"]
+
+        status, response_headers, size = await get(app, path, headers)
+        requests += 1
+        transferred += size
+        if status == 200:
+            cache[path] = response_headers
+    return requests, transferred
+
+
+def write_images(directory: str, images: int, legacy: int, size: int) -> list:
+    paths = []
+    for i in range(images + legacy):
+        data = os.urandom(size)
+        stem = hashlib.sha256(data).hexdigest() if i < images else str(uuid.uuid4())
+        with open(os.path.join(directory, f"{stem}.webp"), "wb") as f:
+            f.write(data)
+        paths.append(f"/{stem}.webp")
+    return paths
+
+
+async def benchmark(images: int, legacy: int, size: int):
+    with tempfile.TemporaryDirectory() as directory:
+        paths = write_images(directory, images, legacy, size)
+        print(f"{images} content-hash + {legacy} UUID-named images of {size} bytes")
+
+        for name, static in (
+            ("StaticFiles", StaticFiles),
+            ("UploadsStaticFiles", UploadsStaticFiles),
+        ):
+            app = static(directory=directory)
+            cache = {}
+            first = await visit(app, paths, cache)
+            repeat = await visit(app, paths, cache)
+            print(
+                f"{name:<19} first visit {first[0]:4} requests {first[1] / 1e3:8.1f} kB  "
+                f"repeat visit {repeat[0]:4} requests {repeat[1] / 1e3:8.1f} kB"
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--images", type=int, default=40)
+    parser.add_argument("--legacy", type=int, default=10)
+    parser.add_argument("--size", type=int, default=30 * 1024)
+    args = parser.parse_args()
+    asyncio.run(benchmark(args.images, args.legacy, args.size))
+
+
+if __name__ == "__main__":
+    main()
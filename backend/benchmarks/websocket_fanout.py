@@ -0,0 +1,88 @@
+"""
+Broadcast fan-out to one gym's sockets: a send-one-after-another loop
+versus ConnectionManager.send_local.
+
+    python -m benchmarks.websocket_fanout --sockets 5000 --stalled 5
+
+Sockets are in-process fakes that serialise the message like Starlette
+and take `--latency` seconds to write it; `--stalled` of them never finish,
+as a client on a dead network would.
+"""
+
+import asyncio
+import argparse
+import json
+import time
+
+from app.websocket import ConnectionManager
+
+GYM_ID = "benchmark"
+MESSAGE = {
+    "type": "users.update",
+    "version": 1,
+    "data": {"id": "0" * 32, "first_name": "Bench", "last_name": "Client"},
+}
+
+
+class FakeWebSocket:
+    def __init__(self, latency: float, stalled: bool = False):
+        self.latency = latency
+        self.stalled = stalled
+
+    async def send_json(self, message: dict):
+        json.dumps(message)
+        if self.stalled:
+            await asyncio.Event().wait()
+        await asyncio.sleep(self.latency)
+
+    async def close(self):
+        pass
+
+
+async def sequential(manager: ConnectionManager, gym_id: str, message: dict):
+    for conn in list(manager.active_connections.get(gym_id, ())):
+        try:
+            await asyncio.wait_for(conn.send_json(message), manager.send_timeout)
+        except asyncio.TimeoutError:
+            pass
+
+
+def build_manager(sockets: int, stalled: int, latency: float, timeout: float):
+    manager = ConnectionManager(send_timeout=timeout)
+    for i in range(sockets):
+        manager.join(FakeWebSocket(latency, stalled=i < stalled), GYM_ID)
+    return manager
+
+
+async def benchmark(sockets: int, stalled: int, latency: float, timeout: float):
+    print(
+        f"{sockets} sockets, {stalled} stalled, "
+        f"{latency * 1000:.0f} ms write, {timeout:.1f} s send timeout"
+    )
+    for name, fan_out in (
+        ("sequential", sequential),
+        ("send_local", ConnectionManager.send_local),
+    ):
+        manager = build_manager(sockets, stalled, latency, timeout)
+        start = time.perf_counter()
+        await fan_out(manager, GYM_ID, MESSAGE)
+        elapsed = time.perf_counter() - start
+        remaining = len(manager.active_connections.get(GYM_ID, ()))
+        print(
+            f"{name:<11} {elapsed * 1000:9.0f} ms  "
+            f"{remaining} sockets kept for the next broadcast"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sockets", type=int, default=5000)
+    parser.add_argument("--stalled", type=int, default=5)
+    parser.add_argument("--latency", type=float, default=0.001)
+    parser.add_argument("--timeout", type=float, default=1.0)
+    args = parser.parse_args()
+    asyncio.run(benchmark(args.sockets, args.stalled, args.latency, args.timeout))
+
+
+if __name__ == "__main__":
+    main()
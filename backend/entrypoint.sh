@@ -8,6 +8,11 @@ while ! nc -z db 5432; do
 done
 echo "PostgreSQL started!"
 
+# Migrate once before the workers fork. create_all never alters existing
+# tables, so this runs even when SCHEMA_CREATE_ALL is on (dev); app.migrate
+# decides between create_all + stamp and an upgrade
+python -m app.migrate
+
 exec "$@"
 
 
@@ -0,0 +1,57 @@
+import asyncio
+import uuid
+from datetime import date, datetime, timedelta, timezone
+
+import pytest
+from pydantic import ValidationError
+from sqlalchemy import func, select
+
+from app.config import settings
+from app.models import Attendance, GymDailyStats
+from app.schemas.admin import AttendanceBatchCreate
+from app.utils import record_attendance
+
+PARALLEL_CHECK_INS = 100
+
+
+@pytest.mark.asyncio
+async def test_parallel_check_ins_record_one_attendance(session_factory, gym_member):
+    user_id, gym_id = gym_member
+
+    async def check_in() -> bool:
+        async with session_factory() as db:
+            checked_in = await record_attendance(user_id, gym_id, db)
+            await db.commit()
+            return checked_in
+
+    results = await asyncio.gather(*(check_in() for _ in range(PARALLEL_CHECK_INS)))
+
+    async with session_factory() as db:
+        attendance_rows = await db.scalar(
+            select(func.count(Attendance.id)).where(
+                Attendance.user_id == user_id, Attendance.gym_id == gym_id
+            )
+        )
+        stats = await db.get(GymDailyStats, (gym_id, date.today()))
+
+    assert results.count(True) == 1
+    assert attendance_rows == 1
+    assert stats.attendance_count == 1
+
+
+def test_batch_rejects_scans_from_the_future():
+    user_id = uuid.uuid4()
+    skew = timedelta(seconds=settings.SCAN_CLOCK_SKEW_SECONDS)
+
+    AttendanceBatchCreate(
+        scans=[{"user_id": user_id, "timestamp": datetime.now() + skew / 2}]
+    )
+    with pytest.raises(ValidationError):
+        AttendanceBatchCreate(
+            scans=[
+                {
+                    "user_id": user_id,
+                    "timestamp": datetime.now(timezone.utc) + skew * 2,
+                }
+            ]
+        )
@@ -0,0 +1,82 @@
+import json
+import uuid
+from datetime import date, timedelta
+
+import pytest
+from sqlalchemy import text
+
+# Hot-path filters and the index each one is expected to use. Test tables
+# are tiny, so sequential scans are disabled to ask whether the index can
+# serve the query shape at all rather than whether it is cheapest here.
+HOT_QUERIES = [
+    (
+        "SELECT * FROM attendance WHERE gym_id = :gym_id AND date = :day",
+        "ix_attendance_gym_id_date",
+    ),
+    (
+        "SELECT * FROM payments WHERE gym_id = :gym_id"
+        " AND payment_date BETWEEN :start AND :day",
+        "ix_payments_gym_id_payment_date",
+    ),
+    (
+        "SELECT * FROM daily_subscriptions WHERE gym_id = :gym_id"
+        " AND subscription_date = :day",
+        "ix_daily_subscriptions_gym_id_date",
+    ),
+    (
+        "SELECT * FROM subscription WHERE gym_id = :gym_id"
+        " AND is_active = true AND end_date < :day",
+        "ix_subscription_gym_id_active_end",
+    ),
+    (
+        "SELECT * FROM subscription WHERE user_id = :user_id"
+        " AND is_active = true AND end_date >= :day",
+        "ix_subscription_user_id_active_end",
+    ),
+    (
+        "SELECT * FROM users WHERE gym_id = :gym_id AND role = 'client'",
+        "ix_users_gym_id_role",
+    ),
+    (
+        "SELECT * FROM products WHERE gym_id = :gym_id ORDER BY created_at DESC",
+        "ix_products_gym_id_created_at",
+    ),
+    (
+        "SELECT * FROM users WHERE first_name ILIKE '%ali%'",
+        "ix_users_first_name_trgm",
+    ),
+    (
+        "SELECT * FROM users WHERE phone_number ILIKE '%901%'",
+        "ix_users_phone_number_trgm",
+    ),
+]
+
+
+def index_names(plan: dict) -> set[str]:
+    names = {plan["Index Name"]} if "Index Name" in plan else set()
+    for child in plan.get("Plans", ()):
+        names |= index_names(child)
+    return names
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("query, index", HOT_QUERIES)
+async def test_hot_query_uses_index(session_factory, query, index):
+    params = {
+        "gym_id": uuid.uuid4(),
+        "user_id": uuid.uuid4(),
+        "day": date.today(),
+        "start": date.today() - timedelta(days=30),
+    }
+
+    async with session_factory() as db:
+        await db.execute(text("SET LOCAL enable_seqscan = off"))
+        result = await db.execute(text(f"EXPLAIN (FORMAT JSON) {query}"), params)
+        explain = result.scalar()
+
+    # asyncpg hands json columns back as text
+    if isinstance(explain, str):
+        explain = json.loads(explain)
+    plan = explain[0]["Plan"]
+
+    assert index in index_names(plan)
@@ -0,0 +1,63 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import func, select
+
+from app.endpoints.market import checkout_basket, sell_product
+from app.models import Products, ProductSales
+from app.schemas.products import BasketCheckoutRequest, ProductSellRequest
+
+CONCURRENT_SELLERS = 50
+
+
+async def sell_concurrently(session_factory, gym_id, endpoint, request) -> list:
+    async def sell() -> bool:
+        async with session_factory() as db:
+            try:
+                await endpoint(request, gym_id=str(gym_id), db=db)
+            except HTTPException as e:
+                assert e.status_code == 400
+                return False
+            return True
+
+    return await asyncio.gather(*(sell() for _ in range(CONCURRENT_SELLERS)))
+
+
+async def stock_and_sold(session_factory, product_id) -> tuple[int, int]:
+    async with session_factory() as db:
+        current_amount = await db.scalar(
+            select(Products.current_amount).where(Products.id == product_id)
+        )
+        sold = await db.scalar(
+            select(func.coalesce(func.sum(ProductSales.quantity), 0)).where(
+                ProductSales.product_id == product_id
+            )
+        )
+    return current_amount, sold
+
+
+@pytest.mark.asyncio
+async def test_concurrent_sales_never_oversell(session_factory, market_product):
+    product_id, gym_id = market_product
+    request = ProductSellRequest(
+        product_id=str(product_id), quantity=1, payment_method="cash"
+    )
+
+    results = await sell_concurrently(session_factory, gym_id, sell_product, request)
+
+    assert results.count(True) == 10
+    assert await stock_and_sold(session_factory, product_id) == (0, 10)
+
+
+@pytest.mark.asyncio
+async def test_concurrent_baskets_never_oversell(session_factory, market_product):
+    product_id, gym_id = market_product
+    request = BasketCheckoutRequest(
+        items=[{"product_id": product_id, "quantity": 3}], payment_method="card"
+    )
+
+    results = await sell_concurrently(session_factory, gym_id, checkout_basket, request)
+
+    assert results.count(True) == 3
+    assert await stock_and_sold(session_factory, product_id) == (1, 9)
@@ -312,7 +312,11 @@ export default function MarketContent() {
                                                 <div className="flex items-center gap-3">
                                                     {product.image_path ? (
                                                         <img
-                                                            src={`${baseUrl}${product.image_path}`}
+                                                            src={`${baseUrl}${product.thumbnail_path || product.image_path}`}
+                                                            onError={(e) => {
+                                                                const fullUrl = `${baseUrl}${product.image_path}`;
+                                                                if (e.currentTarget.src !== fullUrl) e.currentTarget.src = fullUrl;
+                                                            }}
                                                             alt={product.name}
                                                             className="w-10 h-10 rounded-lg object-cover"
                                                         />
@@ -378,7 +382,11 @@ export default function MarketContent() {
                                     <div className="flex items-start gap-3">
                                         {product.image_path ? (
                                             <img
-                                                src={`${baseUrl}${product.image_path}`}
+                                                src={`${baseUrl}${product.thumbnail_path || product.image_path}`}
+                                                onError={(e) => {
+                                                    const fullUrl = `${baseUrl}${product.image_path}`;
+                                                    if (e.currentTarget.src !== fullUrl) e.currentTarget.src = fullUrl;
+                                                }}
                                                 alt={product.name}
                                                 className="w-16 h-16 rounded-lg object-cover flex-shrink-0"
                                             />
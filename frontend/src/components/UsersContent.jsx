@@ -19,6 +19,8 @@ export default function UsersContent() {
     const [isLoadingNotifications, setIsLoadingNotifications] = useState(true);
     const [searchQuery, setSearchQuery] = useState("");
     const websocketRef = useRef(null);
+    // Version of the last applied snapshot or delta; null when unknown
+    const usersVersionRef = useRef(null);
     const navigate = useNavigate();
 
     const getGymId = () => localStorage.getItem("gym_id");
@@ -84,6 +86,35 @@ export default function UsersContent() {
                     const message = JSON.parse(event.data);
                     if (message.type === "users" && message.data) {
                         setUsers(message.data);
+                        usersVersionRef.current = message.version ?? null;
+                    } else if (message.type === "users.delta") {
+                        // A gap (or no known version) means a change was
+                        // missed, so take a fresh snapshot instead
+                        if (
+                            usersVersionRef.current === null ||
+                            message.version !== usersVersionRef.current + 1
+                        ) {
+                            usersVersionRef.current = null;
+                            ws.send(JSON.stringify({ type: "users", gym_id: getGymId() }));
+                            return;
+                        }
+                        usersVersionRef.current = message.version;
+                        setUsers((prev) => {
+                            const rest = prev.filter((user) => user.id !== message.data.id);
+                            if (message.op === "delete") {
+                                return rest;
+                            }
+                            const index = prev.findIndex((user) => user.id === message.data.id);
+                            if (index === -1) {
+                                return [...rest, message.data];
+                            }
+                            const next = [...prev];
+                            next[index] = { ...prev[index], ...message.data };
+                            return next;
+                        });
+                    } else if (message.type === "users.resync") {
+                        usersVersionRef.current = null;
+                        ws.send(JSON.stringify({ type: "users", gym_id: getGymId() }));
                     }
                 } catch (err) {
                     // Silent error handling